@@ -1,18 +1,39 @@
-from sympy import symbols, Not, And, Or, Implies, Equivalent
-from sympy.logic.boolalg import to_cnf
-from sympy.logic.inference import satisfiable
-from itertools import combinations
 from queue import PriorityQueue
 from node import Node
-import collections
+from kb import HAZARDS, PERCEPTS, Budget, BudgetExceeded, Knowledge, symbol_name, parse_symbol, unit, equivalence, linked_names, propagate_units, simplify_clauses
+from directions import DIRECTIONS, OFFSETS, FACING, MOVES, TURN_COST, TURNS
+import time
 
-DIRECTIONS = ['NORTH', 'EAST', 'SOUTH', 'WEST']
+KB_SIZE_BUDGET = 150  # clauses added since the last maintenance pass
+KB_TIME_BUDGET = 5.0  # seconds since the last maintenance pass
+KB_STEP_BUDGET = 50  # steps since the last maintenance pass, instead of seconds under budgets
+ITEM_PERCEPTS = {'H_P': 'G_L', 'W': 'S', 'G': None}  # percept each removable item causes around it
+GOLD_REWARD = 5000
+DEATH_PENALTY = 10000
+POISON_DAMAGE = 25  # hp lost in a cell with poisonous gas
+GOLD_CHANCE = 0.05  # chance an unexplored cell holds gold, as in generated maps
+SHOOT_THRESHOLD = 0.5  # lowest wumpus probability worth an arrow
+ARROWS = 1  # arrows an agent starts with
+SAFE_MOVE_ORDER = [FACING[direction] for direction in ('NORTH', 'SOUTH', 'EAST', 'WEST')]  # ties go to the first
+EXPAND_ORDER = [FACING[direction] for direction in ('NORTH', 'SOUTH', 'WEST', 'EAST')]
+
+def shared(name):
+    return property(lambda self: getattr(self.knowledge, name),
+                    lambda self, value: setattr(self.knowledge, name, value))
 
 class Agent:
-    def __init__(self, program):
-        self.KB = And()
-        self.start = (1, 1)
-        self.pos = (1, 1)
+    KB = shared('KB')
+    KB_tags = shared('KB_tags')
+    clause_tags = shared('clause_tags')
+    safety_cache = shared('safety_cache')
+    KB_size_mark = shared('KB_size_mark')
+    KB_time_mark = shared('KB_time_mark')
+
+    def __init__(self, program, start=(1, 1), knowledge=None):
+        self.knowledge = knowledge if knowledge is not None else Knowledge()
+        self.backend = self.knowledge.backend
+        self.start = start
+        self.pos = start
         self.program = program
         self.grid_size = program.size
         self.facing = 'NORTH'
@@ -24,6 +45,30 @@ class Agent:
         self.point = 0
         self.hp = 100
         self.available_hp = 0
+        self.arrows = ARROWS
+        self.alive = True
+        self.cause = None  # hazard the agent died in
+        self.potions_found = 0
+        self.potions_used = 0
+        self.steps = 0
+        self.agent_id = 0  # tells apart the events of agents sharing a sink
+        self.frontier = []
+        self.step_callbacks = []
+        self.risk_model = None
+        self.cell_value = GOLD_CHANCE * GOLD_REWARD  # expected reward of entering an unexplored cell
+        self.planner = None
+        self.query_executor = None
+        self.unproven = (None, set())  # KB the hazard-free queries of these symbols failed against
+        self.queries = 0  # entailment queries sent to the backend
+        self.inference_time = 0.0
+        self.resolvents = 0
+        self.budgets = None
+        self.step_marks = (0, 0.0)  # resolvents and inference time when the step began
+        self.truncated = None  # budget the episode first ran out of
+        self.KB_size_budget = KB_SIZE_BUDGET
+        self.KB_time_budget = KB_TIME_BUDGET
+        self.KB_step_budget = KB_STEP_BUDGET
+        self.KB_step_mark = 0
         
         for i in range (1, self.grid_size + 1):
             for j in range(1, self.grid_size + 1):
@@ -49,82 +94,185 @@ class Agent:
             
         return neighbors
     
-    def update_KB(self):
+    def KB_size(self):
+        return self.backend.size(self.KB)
+
+    def query_budget(self):
+        # What is left of the step and episode budgets for the next query
+        limits = self.budgets
+        if limits is None:
+            return Budget()
+        resolvents = [limit - used for limit, used in ((limits.step_resolvents, self.resolvents - self.step_marks[0]),
+                                                       (limits.episode_resolvents, self.resolvents))
+                      if limit is not None]
+        seconds = [limit - used for limit, used in ((limits.step_seconds, self.inference_time - self.step_marks[1]),
+                                                    (limits.episode_seconds, self.inference_time))
+                   if limit is not None]
+        return Budget(max(min(resolvents), 0) if resolvents else None, min(seconds) if seconds else None)
+
+    def truncate(self, reason):
+        if self.truncated is None:
+            self.truncated = reason
+            self.log('truncate', f"Out of {reason} budget, open queries count as unsafe")
+
+    def log(self, kind, message=None, facing=None):
+        # The message goes to the action log, a structured event to the world's sinks
+        if message is not None:
+            self.program.add_action(message)
+        if self.program.event_sinks:
+            self.program.emit({
+                'agent': self.agent_id,
+                'step': self.steps,
+                'type': kind,
+                'cell': self.pos,
+                'facing': facing or self.facing,
+                'hp': self.hp,
+                'point': self.point,
+                'potions': self.available_hp,
+                'percepts': [percept for percept in PERCEPTS if f'.{percept}.' in self.program.get_cell_info(self.pos)],
+                'KB_size': self.KB_size(),
+                'queries': self.queries,
+                'inference_seconds': round(self.inference_time, 6),
+            })
+    
+    def maintenance_due(self):
+        # A clock would make budgeted episodes, which must end the same way on
+        # every run, depend on the speed of the machine; they count steps
+        if self.budgets is not None:
+            return self.steps - self.KB_step_mark >= self.KB_step_budget
+        return time.time() - self.KB_time_mark >= self.KB_time_budget
+
+    def maintain_KB(self, force=False):
+        size = self.KB_size()
+        grown = size - self.KB_size_mark
+        if not force and (grown <= 0 or (grown < self.KB_size_budget and not self.maintenance_due())):
+            return 0
+        clauses = self.backend.clauses(self.KB)
+        # Proofs linked to a fluent may not survive its retraction, so they are
+        # not baked into the KB as units
+        fluent = linked_names(clauses, [name for clause in self.clause_tags for name, _ in clause])
+        # Teammates cache proofs without the lock, so the cache is copied before it is walked
+        known = [(name, value) for name, value in list(self.safety_cache.items()) if name not in fluent]
+        clauses = simplify_clauses(clauses, known, self.clause_tags)
+        self.KB_time_mark = time.time()
+        self.KB_step_mark = self.steps
+        self.KB = self.backend.from_clauses(clauses)
+        self.KB_size_mark = self.KB_size()
+        reclaimed = size - self.KB_size_mark
+        self.log('maintain', f"KB maintenance reclaimed {reclaimed} clauses")
+        return reclaimed
+    
+    def tell(self, clauses, tag=None):
+        # Tagged clauses are fluents that can be retracted once the world changes
+        self.KB = self.backend.conjoin(self.KB, clauses)
+        if tag is not None:
+            for clause in clauses:
+                self.KB_tags[tag].add(clause)
+                self.clause_tags[clause].add(tag)
+
+    def retract(self, tag):
+        removed = set()
+        for clause in self.KB_tags.pop(tag, ()):
+            self.clause_tags[clause].discard(tag)
+            if not self.clause_tags[clause]:
+                del self.clause_tags[clause]
+                removed.add(clause)
+        if removed:
+            # Cached proofs may rest on the removed clauses; what still follows
+            # is proven again when it is asked
+            stale = linked_names(self.backend.clauses(self.KB), [name for clause in removed for name, _ in clause])
+            for name in stale:
+                self.safety_cache.pop(name, None)
+            self.KB = self.backend.remove(self.KB, removed)
+            self.KB_size_mark = min(self.KB_size_mark, self.KB_size())
+        return len(removed)
+
+    def consume(self, kind, cell):
+        # The item and the percepts it caused around it are gone; only those
+        # fluents are retracted, everything derived elsewhere stays
+        retracted = self.retract((kind, cell))
+        if ITEM_PERCEPTS[kind] is not None:
+            for neighbor in self.neighbor_cells(*cell):
+                retracted += self.retract((ITEM_PERCEPTS[kind], neighbor))
+        self.tell([unit(symbol_name(kind, cell), False)])
+        return retracted
+
+    def update_KB(self, entered=True):
         x, y = self.pos
         percepts = self.perceive_current_cell()
-        Ps = []
-        Ws = []
-        PGs = []
-        HPs = []
+        neighbors = self.neighbor_cells(x, y)
         
-        for r, c in self.neighbor_cells(x, y):
-            Ps.append(symbols(f'P{r}{c}'))
-            Ws.append(symbols(f'W{r}{c}'))
-            PGs.append(symbols(f'P_G{r}{c}'))
-            HPs.append(symbols(f'H_P{r}{c}'))
+        def around(kind):
+            return [symbol_name(kind, cell) for cell in neighbors]
         
         # Update KB with inferences based on percepts.
         # Breeze percepts
-        
-        self.KB = And(self.KB, to_cnf(Equivalent(symbols(f'B{x}{y}'), Or(*Ps)), True))
-        if '.B.' in percepts:
-            self.KB = And(self.KB, symbols(f'B{x}{y}'))
-        else:
-            self.KB = And(self.KB, Not(symbols(f'B{x}{y}')))
+        B, S, W_H, G_L = (symbol_name(kind, self.pos) for kind in ('B', 'S', 'W_H', 'G_L'))
+        self.tell(equivalence(B, around('P')))
+        self.tell([unit(B, '.B.' in percepts)])
         
         # Stench percepts
-        self.KB = And(self.KB, to_cnf(Equivalent(symbols(f'S{x}{y}'), Or(*Ws)), True))
+        self.tell(equivalence(S, around('W')))
         if '.S.' in percepts:
-            self.KB = And(self.KB, symbols(f'S{x}{y}'))
+            self.tell([unit(S)], ('S', (x, y)))
         else:
-            self.KB = And(self.KB, Not(symbols(f'S{x}{y}')))
+            self.tell([unit(S, False)])
             
         # Whiff percepts
-        self.KB = And(self.KB, to_cnf(Equivalent(symbols(f'W_H{x}{y}'), Or(*PGs)), True))
-        self.KB = And(self.KB, to_cnf(Equivalent(Not(symbols(f'W_H{x}{y}')), And(*[Not(PG) for PG in PGs])), True))
-        if '.W_H.' in percepts:
-            self.KB = And(self.KB, symbols(f'W_H{x}{y}'))
-        else:
-            self.KB = And(self.KB, Not(symbols(f'W_H{x}{y}')))
+        self.tell(equivalence(W_H, around('P_G')))
+        self.tell([unit(W_H, '.W_H.' in percepts)])
         
         # Glow percepts
-        self.KB = And(self.KB, to_cnf(Equivalent(symbols(f'G_L{x}{y}'), Or(*HPs)), True))
-        self.KB = And(self.KB, to_cnf(Equivalent(Not(symbols(f'G_L{x}{y}')), And(*[Not(HP) for HP in HPs])), True))
+        self.tell(equivalence(G_L, around('H_P')))
         if '.G_L.' in percepts:
-            self.KB = And(self.KB, symbols(f'G_L{x}{y}'))
+            self.tell([unit(G_L)], ('G_L', (x, y)))
         else:
-            self.KB = And(self.KB, Not(symbols(f'G_L{x}{y}')))
+            self.tell([unit(G_L, False)])
         
         if '.P_G.' in percepts:
-            self.hp -= 25
-            self.program.update_status(self.hp, self.point, self.available_hp)
+            if self.risk_model is None:
+                # The plain agent keeps the original rules: every step in the gas hurts, never fatally
+                self.hp -= POISON_DAMAGE
+                self.program.update_status(self.hp, self.point, self.available_hp)
+            else:
+                # Risky moves weigh poison, so it hurts on entering the cell and kills at 0 hp
+                if entered:
+                    self.hp -= POISON_DAMAGE
+                    self.program.update_status(self.hp, self.point, self.available_hp)
+                if self.hp <= 0:
+                    self.cause = 'P_G'
+                    return self.die()
         else:
-            self.KB = And(self.KB, Not(symbols(f'P_G{x}{y}')))
+            self.tell([unit(symbol_name('P_G', self.pos), False)])
         
         if '.H_P.' in percepts:
-            self.KB = And(self.KB, symbols(f'H_P{x}{y}'))
+            self.tell([unit(symbol_name('H_P', self.pos))], ('H_P', (x, y)))
         else:
-            self.KB = And(self.KB, Not(symbols(f'H_P{x}{y}')))
+            self.tell([unit(symbol_name('H_P', self.pos), False)])
+        
+        if '.G.' in percepts:
+            self.tell([unit(symbol_name('G', self.pos))], ('G', (x, y)))
         
         if '.W.' in percepts or '.P.' in percepts:
+            self.cause = 'W' if '.W.' in percepts else 'P'
             return self.die()
         # Ensure current cell is safe
-        self.KB = And(self.KB, Not(symbols(f'W{x}{y}')), Not(symbols(f'P{x}{y}')))
+        self.tell([unit(symbol_name('W', self.pos), False), unit(symbol_name('P', self.pos), False)])
         
     def turn_left(self, current_direction, action):
-        idx = DIRECTIONS.index(current_direction)
-        current_direction = DIRECTIONS[(idx - 1) % 4]
+        current_direction = DIRECTIONS[(FACING[current_direction] - 1) % 4]
         if action:
             self.program.add_action(f"Turning to {current_direction}")
             self.program.move_agent(self.pos, current_direction, 1)
+            self.log('turn', facing=current_direction)
         return current_direction
         
     def turn_right(self, current_direction, action):
-        idx = DIRECTIONS.index(current_direction)
-        current_direction = DIRECTIONS[(idx + 1) % 4]
+        current_direction = DIRECTIONS[(FACING[current_direction] + 1) % 4]
         if action:
             self.program.add_action(f"Turning to {current_direction}")
             self.program.move_agent(self.pos, current_direction, 1)
+            self.log('turn', facing=current_direction)
         return current_direction
     
     def opposite_direction(self, direction):
@@ -137,118 +285,126 @@ class Agent:
         return candidates[direction]
 
     def align_direction_cost(self, current_direction, desired_direction):
-        current_idx = DIRECTIONS.index(current_direction)
-        desired_idx = DIRECTIONS.index(desired_direction)
-        
-        steps_right = (desired_idx - current_idx) % 4
-        steps_left = (current_idx - desired_idx) % 4
-
-        cost = 0
-        
-        if steps_right <= steps_left:
-            for _ in range(steps_right):
-                current_direction = self.turn_right(current_direction, False)
-                cost += 10
-        else:
-            for _ in range(steps_left):
-                current_direction = self.turn_left(current_direction, False)
-                cost += 10
-        return cost
+        return TURN_COST[FACING[current_direction]][FACING[desired_direction]]
 
     def align_direction(self, current_direction, desired_direction):
-        current_idx = DIRECTIONS.index(current_direction)
-        desired_idx = DIRECTIONS.index(desired_direction)
-        
-        steps_right = (desired_idx - current_idx) % 4
-        steps_left = (current_idx - desired_idx) % 4
-        
-        if steps_right <= steps_left:
-            for _ in range(steps_right):
+        for turn in TURNS[FACING[current_direction]][FACING[desired_direction]]:
+            if turn > 0:
                 current_direction = self.turn_right(current_direction, True)
-                self.point -= 10
-                self.program.update_status(self.hp, self.point, self.available_hp)
-        else:
-            for _ in range(steps_left):
+            else:
                 current_direction = self.turn_left(current_direction, True)
-                self.point -= 10
-                self.program.update_status(self.hp, self.point, self.available_hp)
+            self.point -= 10
+            self.program.update_status(self.hp, self.point, self.available_hp)
         return current_direction
 
     def move_forward(self):
         x, y = self.pos
-        if self.facing == 'NORTH' and x < self.grid_size:
-            self.pos = (x+1, y)
-        elif self.facing == 'EAST' and y < self.grid_size:
-            self.pos = (x, y+1)
-        elif self.facing == 'SOUTH' and x > 1:
-            self.pos = (x-1, y)
-        elif self.facing == 'WEST' and y > 1:
-            self.pos = (x, y-1)
-        else:
-            self.program.add_action("Move blocked by boundary")
-            return 0  
-        self.program.add_action(f"Moving to {self.pos}")
-
-        # if 'S' in self.perceive_current_cell():
-        #     self.shoot()
-
+        dx, dy = MOVES[FACING[self.facing]]
+        if not (1 <= x + dx <= self.grid_size and 1 <= y + dy <= self.grid_size):
+            self.log('bump', "Move blocked by boundary")
+            return 0
+        self.pos = (x + dx, y + dy)
+        self.log('move', f"Moving to {self.pos}")
         return 10
     
-    def shoot(self):
+    def choose_target(self):
+        # A neighbour proven to hold a wumpus, else the likeliest one under the risk model
         x, y = self.pos
-        
-        
+        candidates = []
+        for direction, (dx, dy) in OFFSETS.items():
+            cell = (x + dx, y + dy)
+            if (1 <= cell[0] <= self.grid_size and 1 <= cell[1] <= self.grid_size and cell not in self.visited
+                    and not self.is_hazard_free('W', cell) and self.is_hazard_free('P', cell)):
+                candidates.append((direction, cell))
+        for direction, cell in candidates:
+            name = symbol_name('W', cell)
+            if self.safety_cache.get(name) or self.refutes_by_units(name, False):
+                self.safety_cache[name] = True
+                return direction
+        if self.risk_model is not None and candidates:
+            probabilities = self.risk_model.hazard_probabilities(self.backend.clauses(self.KB), [cell for _, cell in candidates], list(self.safety_cache.items()))
+            probability, direction = max((probabilities[cell]['W'], direction) for direction, cell in candidates)
+            if probability >= SHOOT_THRESHOLD:
+                return direction
+        return None
+
+    def shoot(self, direction):
+        # False without an arrow left, the agent then neither turns nor pays
+        if self.arrows <= 0:
+            return False
+        self.arrows -= 1
+        self.facing = self.align_direction(self.facing, direction)
+        x, y = self.pos
+        dx, dy = OFFSETS[direction]
+        target = (x + dx, y + dy)
+        self.point -= 100
+        self.program.update_status(self.hp, self.point, self.available_hp)
+        self.log('shoot', f"Shooting arrow to {target}")
+        if self.program.shoot(target):
+            self.log('scream', f"Heard a scream, the wumpus at {target} is dead")
+            self.consume('W', target)
+        else:
+            self.tell([unit(symbol_name('W', target), False)])
+        self.safety_cache[symbol_name('W', target)] = False
+        self.not_unsafe.discard(target)
+        self.unknown_cells.add(target)
+        return True
+
+    def shoot_wumpus(self, node):
+        if self.arrows <= 0:
+            return None
+        direction = self.choose_target()
+        if direction is None or not self.shoot(direction):
+            return None
+        return Node(node.state, node, ('shoot', self.facing), 0)
+
     def make_safe_move(self, node):
         x, y = node.state
-        possible_moves = [
-            ('NORTH', (x+1, y)),
-            ('SOUTH', (x-1, y)),
-            ('EAST', (x, y+1)),
-            ('WEST', (x, y-1))
-        ]
+        possible_moves = [(DIRECTIONS[d], (x + MOVES[d][0], y + MOVES[d][1])) for d in SAFE_MOVE_ORDER]
         actions = ['climb', 'grab', 'heal', 'move']
         
         not_pit = False
         not_wumpus = False
         not_poison = False
         
-        if self.hp <= 50 and self.available_hp > 0:
-            self.point -= 10
-            self.available_hp -= 1
-            self.hp += 25
-            self.program.update_status(self.hp, self.point, self.available_hp)
-            self.program.add_action(f"Using healing potion")
-            return Node((x,y), node, (actions[2], self.facing), 0)
-        
-        if self.available_hp <= 3 and '.H_P.' in self.perceive_current_cell():
-            self.point -= 10
-            self.available_hp += 1
-            self.program.update_status(self.hp, self.point, self.available_hp)
-            self.program.remove_element((x,y), 'H_P')
-            self.program.add_action(f"Picking up healing potion at ({x, y})")
-            return Node((x,y), node, (actions[1], self.facing), 0)
+        if self.planner is None:
+            child = self.use_potions(node)
+            if child is not None:
+                return child
         
+        if self.query_executor is not None:
+            cells = set((r, c) for _, (r, c) in possible_moves
+                        if 1 <= r <= self.grid_size and 1 <= c <= self.grid_size and (r, c) not in self.visited)
+            # The planner sees every proven cell of the frontier, not only the neighbours
+            self.query_hazards(cells | self.frontier_cells() if self.planner is not None else cells)
+
         # Calculate the alignment cost for each possible move
+        turn_costs = TURN_COST[FACING[self.facing]]
         moves_with_costs = []
         for direction, (r, c) in possible_moves:
             if 1 <= r <= self.grid_size and 1 <= c <= self.grid_size and (r, c) not in self.visited:
-                not_pit = self.PL_resolution(Not(symbols(f'P{r}{c}')))
+                not_pit = self.is_hazard_free('P', (r, c))
                 # Check whether the cell has no wumpus
-                not_wumpus = self.PL_resolution(Not(symbols(f'W{r}{c}')))
+                not_wumpus = self.is_hazard_free('W', (r, c))
                 # Check whether the cell has poison
-                not_poison = self.PL_resolution(Not(symbols(f'P_G{r}{c}')))
+                not_poison = self.is_hazard_free('P_G', (r, c))
                 if not_pit and not_wumpus:
                     if not not_poison:
                         self.not_unsafe.add((r, c))
                     if self.hp < 75 and not not_poison:
                         continue
-                    alignment_cost = self.align_direction_cost(self.facing, direction)
+                    alignment_cost = turn_costs[FACING[direction]]
                     moves_with_costs.append((direction, (r, c), alignment_cost))
                 else:
                     self.not_unsafe.add((r, c))
                 self.reduced_not_unsafe()
                 self.unknown_cells.discard((r, c))
 
+        if self.planner is not None:
+            child = self.make_planned_move(node) or self.use_potions(node)
+            if child is not None:
+                return child
+
         # Sort the possible moves by alignment cost (fewest turns required)
         moves_with_costs.sort(key=lambda move: move[2])  # Sort by alignment_cost
 
@@ -258,8 +414,197 @@ class Agent:
             total_cost = alignment_cost + self.move_forward()
             self.point -= total_cost - alignment_cost
             return Node((r, c), node, (actions[3], direction), total_cost)
+        if '.S.' in self.perceive_current_cell():
+            child = self.shoot_wumpus(node)
+            if child is not None:
+                return child
+        return self.make_risky_move(node, possible_moves)
+
+    def use_potions(self, node):
+        if self.hp <= 50 and self.available_hp > 0:
+            return self.heal(node)
+        
+        if self.available_hp <= 3 and '.H_P.' in self.perceive_current_cell():
+            return self.grab_potion(node)
         return None
 
+    def heal(self, node):
+        self.point -= 10
+        self.available_hp -= 1
+        self.potions_used += 1
+        self.hp += 25
+        self.program.update_status(self.hp, self.point, self.available_hp)
+        self.log('heal', "Using healing potion")
+        return Node(node.state, node, ('heal', self.facing), 0)
+
+    def grab_potion(self, node):
+        x, y = node.state
+        if not self.program.remove_element((x,y), 'H_P'):
+            return None  # another agent was first
+        self.point -= 10
+        self.available_hp += 1
+        self.potions_found += 1
+        self.program.update_status(self.hp, self.point, self.available_hp)
+        self.consume('H_P', (x, y))
+        self.log('potion', f"Picking up healing potion at ({x, y})")
+        return Node((x,y), node, ('grab', self.facing), 0)
+
+    def belief(self):
+        from planner import Belief  # only agents with a planner need it
+        # Team agents in other threads may add to the shared sets and cache,
+        # so they are copied before being walked
+        visited = frozenset(self.visited)
+        safety_cache = dict(self.safety_cache)
+        safe = set(visited)
+        poison_free = set(self.safe)
+        for name, value in safety_cache.items():
+            kind, cell = parse_symbol(name)
+            if kind == 'P_G' and not value:
+                poison_free.add(cell)
+            elif kind == 'P' and not value and not safety_cache.get(symbol_name('W', cell), True):
+                safe.add(cell)
+        wumpus = set(cell for kind, cell in map(parse_symbol, safety_cache) if kind == 'W' and safety_cache[symbol_name(kind, cell)])
+        potions = set()
+        for clause in self.backend.clauses(self.KB):
+            if len(clause) == 1:
+                (name, value), = clause
+                if value and name.startswith('H_P_'):
+                    potions.add(parse_symbol(name)[1])
+        return Belief(self.pos, FACING[self.facing], self.hp, self.available_hp, self.arrows, visited, frozenset(safe),
+                      frozenset(poison_free), frozenset(potions), frozenset(wumpus), self.start, self.grid_size)
+
+    def make_planned_move(self, node):
+        # Only heals, pickups and steps into new cells are taken from the plan,
+        # anything else is left to the greedy search and its backtracking
+        plan = self.planner.best_action(self.belief())
+        if plan is None:
+            return None
+        action, direction = plan
+        if action == 'heal':
+            return self.heal(node)
+        if action == 'grab' and '.H_P.' in self.perceive_current_cell():
+            return self.grab_potion(node)
+        if action == 'shoot' and self.shoot(direction):
+            return Node(node.state, node, ('shoot', self.facing), 0)
+        if action == 'move':
+            x, y = node.state
+            dx, dy = OFFSETS[direction]
+            if (x + dx, y + dy) not in self.visited:
+                alignment_cost = self.align_direction_cost(self.facing, direction)
+                self.facing = self.align_direction(self.facing, direction)
+                total_cost = alignment_cost + self.move_forward()
+                self.point -= total_cost - alignment_cost
+                return Node((x + dx, y + dy), node, ('move', direction), total_cost)
+        return None
+
+    def make_risky_move(self, node, possible_moves):
+        # Only used with a risk model, when no neighbour is provably safe
+        if self.risk_model is None:
+            return None
+        candidates = [(direction, cell) for direction, cell in possible_moves
+                      if 1 <= cell[0] <= self.grid_size and 1 <= cell[1] <= self.grid_size and cell not in self.visited]
+        if not candidates:
+            return None
+        probabilities = self.risk_model.hazard_probabilities(self.backend.clauses(self.KB), [cell for _, cell in candidates], list(self.safety_cache.items()))
+        moves_with_gains = []
+        for direction, cell in candidates:
+            lethal_poison = self.hp <= POISON_DAMAGE
+            risk = self.risk_model.death_risk(probabilities[cell], lethal_poison)
+            # Poison the agent survives costs its share of the hp left
+            poison = 0.0 if lethal_poison else probabilities[cell]['P_G'] * POISON_DAMAGE / self.hp * DEATH_PENALTY
+            alignment_cost = self.align_direction_cost(self.facing, direction)
+            # What the cell may hold against the chance of dying or being poisoned there and the cost of the step
+            gain = (1 - risk) * self.cell_value - risk * DEATH_PENALTY - poison - alignment_cost - 10
+            if gain > 0:
+                moves_with_gains.append((-gain, risk, alignment_cost, direction, cell))
+        if not moves_with_gains:
+            return None
+        _, risk, alignment_cost, direction, (r, c) = min(moves_with_gains)
+        self.log('risk', f"Taking a {risk:.0%} risk moving to {(r, c)}")
+        self.facing = self.align_direction(self.facing, direction)
+        total_cost = alignment_cost + self.move_forward()
+        self.point -= total_cost - alignment_cost
+        return Node((r, c), node, ('move', direction), total_cost)
+
+    def is_hazard_free(self, kind, cell):
+        # Proofs are cached until a retraction removes clauses they may rest on;
+        # a failed query is only remembered for the KB it failed against
+        name = symbol_name(kind, cell)
+        cached = self.safety_cache.get(name)
+        if cached is not None:
+            return not cached
+        if name in self.unproven_against(self.KB):
+            return False
+        self.queries += 1
+        budget = self.query_budget()
+        started = time.perf_counter()
+        try:
+            proven = self.backend.entails(self.KB, (name, False), budget)
+        except BudgetExceeded as exceeded:
+            # Unknown, which is unsafe; nothing is cached so a later step can ask again
+            proven = False
+            self.truncate(str(exceeded))
+        self.inference_time += time.perf_counter() - started
+        self.resolvents += budget.used
+        if proven:
+            self.safety_cache[name] = False
+            return True
+        return False
+
+    def query_hazards(self, cells):
+        # Answers every open hazard-free query of the cells at once in worker processes
+        if self.query_executor is None:
+            return
+        KB = self.KB
+        unproven = self.unproven_against(KB)
+        names = [symbol_name(kind, cell) for cell in cells for kind in HAZARDS]
+        names = [name for name in names if name not in self.safety_cache and name not in unproven]
+        if not names:
+            return
+        self.queries += len(names)
+        budget = self.query_budget()
+        started = time.perf_counter()
+        answers = self.query_executor.refute_all(self.backend.clauses(KB), [(name, True) for name in names], budget)
+        self.inference_time += time.perf_counter() - started
+        self.resolvents += budget.used
+        for (name, _), proven in answers.items():
+            if proven is None:
+                continue  # out of budget, is_hazard_free asks again with what is left
+            if proven:
+                self.safety_cache[name] = False
+            else:
+                unproven.add(name)
+
+    def unproven_against(self, KB):
+        # Failed queries only hold for the KB they ran on; those of older KBs are dropped
+        if self.unproven[0] is not KB:
+            self.unproven = (KB, set())
+        return self.unproven[1]
+
+    def frontier_cells(self):
+        cells = set()
+        visited = frozenset(self.visited)  # a copy, team agents add to it from other threads
+        for x, y in visited:
+            cells.update(cell for cell in self.neighbor_cells(x, y) if cell not in visited)
+        return cells
+
+    def refutes_by_units(self, name, value):
+        # Sound but incomplete; proving a hazard present by resolution saturates
+        # around large stench regions, unit propagation stays linear
+        self.queries += 1
+        try:
+            self.query_budget().check()
+        except BudgetExceeded as exceeded:
+            self.truncate(str(exceeded))
+            return False
+        started = time.perf_counter()
+        clauses = self.backend.clauses(self.KB)
+        known = list(self.safety_cache.items())
+        refuted = (propagate_units(clauses, known + [(name, value)]) is None
+                   and propagate_units(clauses, known) is not None)
+        self.inference_time += time.perf_counter() - started
+        return refuted
+
     def is_surrounded_by_unsafe(self, cell):
         x, y = cell
         neighbors = self.neighbor_cells(x, y)
@@ -269,12 +614,28 @@ class Agent:
                 return False
         return True
 
-    def explore(self):
-        frontier = []
-        frontier.append(Node(self.start, None, ('move', self.facing), 0))  # (cost, position, direction, path)
+    def explore(self, frontier=None):
+        for _ in self.exploration(frontier):
+            pass
+        return None
+
+    def exploration(self, frontier=None):
+        # Yields after every step so that several agents can be interleaved
+        if frontier is None:
+            frontier = []
+            frontier.append(Node(self.start, None, ('move', self.facing), 0))  # (cost, position, direction, path)
+            self.log('start')
+        self.frontier = frontier
         
         while len(frontier) != 0:
+            if self.budgets is not None and self.budgets.steps is not None and self.steps >= self.budgets.steps:
+                self.truncate('step')
+                return None
+            self.step_marks = (self.resolvents, self.inference_time)
+            for callback in self.step_callbacks:
+                callback(self)
             node = frontier.pop()
+            self.steps += 1
             self.pos = node.state
             action, self.facing = node.action
             if action == 'move':
@@ -290,13 +651,13 @@ class Agent:
             
             self.unknown_cells.discard(self.pos)
             if self.pos != self.start:
-                self.update_KB()
+                self.update_KB(action == 'move')
+                if not self.alive:
+                    return None
+                self.maintain_KB()
 
             if '.G.' in self.perceive_current_cell():
-                self.program.add_action(f"Gold found at {self.pos}!")
-                self.point += 5000
-                self.program.update_status(self.hp, self.point, self.available_hp)
-                self.program.remove_gold(self.pos)
+                self.grab_gold()
                                    
             for unknown_cell in list(self.unknown_cells):  # Sử dụng list() để tránh thay đổi tập hợp khi duyệt
                 if self.is_surrounded_by_unsafe(unknown_cell):
@@ -312,34 +673,72 @@ class Agent:
                     self.tracked_path.append((node.state, self.facing))
             else:
                 self.program.add_action("No safe moves left. Backtracking.")
-                self.program.add_action("No safe moves left. Checking for inaccessible cells.")
+                self.log('backtrack', "No safe moves left. Checking for inaccessible cells.")
                 if not self.unknown_cells:
-                    self.program.add_action("No more safe cells to explore. Returning to start.")
+                    self.log('return', "No more safe cells to explore. Returning to start.")
                     self.find_path_to_start()
                     return
                 if not self.tracked_path:
-                    self.program.add_action("No more positions to backtrack to. Exiting.")
-                    print(self.unknown_cells)
-                    print(self.safe)
-                    print(self.not_unsafe)
+                    self.log('exit', "No more positions to backtrack to. Exiting.")
+                    self.program.add_action(f"Unknown cells left: {sorted(self.unknown_cells)}")
+                    self.program.add_action(f"Unsafe cells: {sorted(self.not_unsafe)}")
                     return None
-                pos, direction = self.tracked_path.pop()
-                self.facing = self.align_direction(self.facing, self.opposite_direction(direction))
-                self.point -= self.move_forward()
-                prev_node = Node(pos, node, ('move', self.facing), 0)
-                frontier.append(prev_node)
+                pos, direction = self.tracked_path[-1]
+                if self.risk_model is not None and self.hp <= POISON_DAMAGE and not self.is_hazard_free('P_G', pos):
+                    # Stepping back into the gas would take the last of the agent's hp
+                    if self.available_hp > 0:
+                        frontier.append(self.heal(node))
+                    elif self.reaches_start():
+                        self.log('return', "Too hurt to backtrack through poison. Returning to start.")
+                        self.find_path_to_start()
+                        return
+                    else:
+                        self.log('exit', f"Too hurt to backtrack through poison and no safe route to start. Stopping at {self.pos}.")
+                        return None
+                else:
+                    self.tracked_path.pop()
+                    self.facing = self.align_direction(self.facing, self.opposite_direction(direction))
+                    self.point -= self.move_forward()
+                    prev_node = Node(pos, node, ('move', self.facing), 0)
+                    frontier.append(prev_node)
+            self.log('step')
+            yield node
 
         return None
     
+    def grab_gold(self):
+        if not self.program.remove_gold(self.pos):
+            return False
+        self.point += GOLD_REWARD
+        self.program.update_status(self.hp, self.point, self.available_hp)
+        self.log('gold', f"Gold found at {self.pos}!")
+        self.consume('G', self.pos)
+        return True
+
     def reduced_not_unsafe(self):
         cells = self.safe.intersection(self.not_unsafe)
         for cell in cells:
             self.not_unsafe.discard(cell)
 
+    def reaches_start(self):
+        # Whether find_path_to_start has a route home that avoids the unsafe cells
+        reached = {self.pos}
+        frontier = [self.pos]
+        while frontier:
+            row, col = frontier.pop()
+            if (row, col) == self.start:
+                return True
+            for d in EXPAND_ORDER:
+                r, c = row + MOVES[d][0], col + MOVES[d][1]
+                if 1 <= r <= self.grid_size and 1 <= c <= self.grid_size and (r, c) not in self.not_unsafe and (r, c) not in reached:
+                    reached.add((r, c))
+                    frontier.append((r, c))
+        return False
+
     def find_path_to_start(self):
         # Implement a method to backtrack to the starting position
         start = Node(self.pos, None, None, 0)
-        goal = (1, 1)
+        goal = self.start
         frontier = PriorityQueue()
         reached = dict()
         reached[start.state] = start
@@ -358,6 +757,7 @@ class Agent:
                 self.program.update_status(self.hp, self.point, self.available_hp)
                 self.point += 10
                 self.program.update_status(self.hp, self.point, self.available_hp)
+                self.log('climb')
                 return node
             
             for child in self.expand(node, goal):
@@ -374,77 +774,22 @@ class Agent:
             return abs(state[0] - goal[0])*10 + abs(state[1] - goal[1])*10
         
         row, col = node.state
-        candidates = [
-            ('NORTH', (row + 1, col)),
-            ('SOUTH', (row - 1, col)),
-            ('WEST', (row, col - 1)),
-            ('EAST', (row, col + 1))
-        ]
+        turn_costs = TURN_COST[FACING[self.facing]]
         nodes = []
-        for direction, (r, c) in candidates:
+        for d in EXPAND_ORDER:
+            direction = DIRECTIONS[d]
+            r, c = row + MOVES[d][0], col + MOVES[d][1]
             if 1 <= r <= self.grid_size and 1 <= c <= self.grid_size:
                 if (r, c) not in self.not_unsafe:
                     childState = (r, c)
-                    cost = self.align_direction_cost(self.facing, direction) + 10
+                    cost = turn_costs[d] + 10
                     h = heuristic(childState, goal)
                     nodes.append(Node((r, c), node, direction, cost, h))
         return nodes
 
-    def PL_resolve(self, literal, Ci, Cj):
-        clause1 = set(Ci.args if isinstance(Ci, Or) else [Ci])
-        clause2 = set(Cj.args if isinstance(Cj, Or) else [Cj])
-        clause1.remove(literal)
-        clause2.remove(Not(literal))
-        if any(Not(other) in clause2 for other in clause1):
-            return None
-
-        return clause1.union(clause2)
-    
-    def PL_resolution(self, query):
-        negate_query_cnf = to_cnf(Not(query), True)
-        tainted_clauses = set(negate_query_cnf.args if isinstance(negate_query_cnf, Or) else [negate_query_cnf])
-        clauses = set(self.KB.args if isinstance(self.KB, And) else [self.KB])
-        clauses.update(tainted_clauses)
-        new = set()
-        
-        while True:
-            clausesWith = collections.defaultdict(list)
-            for clause in clauses:
-                if isinstance(clause, Or):
-                    for literal in clause.args:
-                        clausesWith[literal].append(clause)
-                else:
-                    clausesWith[clause].append(clause)
-
-            pairs = []
-            for Ci in tainted_clauses:
-                if isinstance(Ci, Or):
-                    for literal in Ci.args:
-                        for Cj in clausesWith[Not(literal)]:
-                            pairs.append((literal, Ci, Cj))
-                else:
-                    literal = Ci
-                    for Cj in clausesWith[Not(literal)]:
-                        pairs.append((literal, Ci, Cj))
-
-            for (literal, Ci, Cj) in pairs:
-                resolvent = self.PL_resolve(literal, Ci, Cj)
-                if resolvent is not None:
-                    if resolvent == set():
-                        return True
-                    else:
-                        new.add(Or(*resolvent))
-
-            added = False
-            for clause in new:
-                if clause not in clauses:
-                    tainted_clauses.add(clause)
-                    clauses.add(clause)
-                    added = True
-
-            if not added:
-                return False
-
     def die(self):
-        self.program.add_action(f"Agent died at position {self.pos}.")
+        self.alive = False
+        self.point -= DEATH_PENALTY
+        self.program.update_status(self.hp, self.point, self.available_hp)
+        self.log('die', f"Agent died at position {self.pos}.")
 
@@ -0,0 +1,174 @@
+import csv
+import json
+import os
+import numpy as np
+from kb import HAZARDS
+
+RESULT_DTYPE = np.dtype([
+    ('label', 'U32'), ('map', 'U128'), ('seed', 'i8'), ('size', 'i4'), ('density', 'f8'), ('backend', 'U8'),
+    ('point', 'i8'), ('hp', 'i4'), ('potions', 'i4'), ('potions_found', 'i4'), ('potions_used', 'i4'),
+    ('alive', '?'), ('cause', 'U4'), ('steps', 'i8'), ('visited', 'i4'), ('queries', 'i8'),
+    ('resolvents', 'i8'), ('inference_seconds', 'f8'), ('seconds', 'f8'), ('truncated', 'U16'),
+])
+METRICS = ('point', 'steps', 'visited', 'potions_used', 'inference_seconds')
+PERCENTILES = (50, 90, 99)
+CAUSES = HAZARDS  # an agent dies in a pit, to the wumpus or of poison
+DENSITY_WIDTH = 0.05  # width of the hazard density bins reports group by
+
+def result_dtype(records):
+    """RESULT_DTYPE with every string field widened to the longest value in
+    records, so long map paths and labels are kept whole."""
+    fields = []
+    for name in RESULT_DTYPE.names:
+        kind = RESULT_DTYPE[name]
+        if kind.kind == 'U':
+            longest = max((len(str(record.get(name) or '')) for record in records), default=0)
+            kind = np.dtype(f'U{max(kind.itemsize // 4, longest)}')
+        fields.append((name, kind))
+    return np.dtype(fields)
+
+def to_array(records):
+    """Packs result records (dicts) into a structured array of result_dtype."""
+    array = np.zeros(len(records), dtype=result_dtype(records))
+    for i, record in enumerate(records):
+        for field in RESULT_DTYPE.names:
+            value = record.get(field)
+            if value is None or value == '':
+                value = -1 if field == 'seed' else array.dtype[field].type()
+            elif field == 'alive' and isinstance(value, str):
+                value = value == 'True'
+            array[i][field] = value
+    return array
+
+def save_results(records, path):
+    np.save(path, records if isinstance(records, np.ndarray) else to_array(records))
+
+def load_results(*paths):
+    """Loads result files into one structured array.
+
+    .npy files are memory-mapped, so only the columns a report touches are
+    read; JSON lines and CSV files written by batch are parsed.
+    """
+    arrays = []
+    for path in paths:
+        ext = os.path.splitext(path)[1]
+        if ext == '.npy':
+            arrays.append(np.load(path, mmap_mode='r'))
+        elif ext == '.csv':
+            with open(path, newline='') as f:
+                arrays.append(to_array(list(csv.DictReader(f))))
+        else:
+            with open(path) as f:
+                arrays.append(to_array([json.loads(line) for line in f if line.strip()]))
+    return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+def key_columns(results, by):
+    """Returns the grouping columns; density is binned to DENSITY_WIDTH."""
+    columns = {}
+    for key in by:
+        if key == 'density':
+            columns[key] = np.round(np.floor(results['density'] / DENSITY_WIDTH + 1e-9) * DENSITY_WIDTH, 2)
+        else:
+            columns[key] = np.asarray(results[key])
+    return columns
+
+def group_index(results, by):
+    """Returns (group keys, group of each row)."""
+    if not by:
+        return np.zeros(1, dtype=[('all', 'i1')]), np.zeros(len(results), dtype=np.intp)
+    keys = np.rec.fromarrays(list(key_columns(results, by).values()), names=list(by))
+    groups, inverse = np.unique(keys, return_inverse=True)
+    return groups, inverse.ravel()
+
+def grouped_percentiles(values, inverse, counts, percentiles):
+    """Linear-interpolated percentiles of every group at once.
+
+    Sorting by (group, value) puts each group in one sorted run, so every
+    percentile is a pair of positions inside its run.
+    """
+    order = np.lexsort((values, inverse))
+    ordered = values[order].astype(float)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = {}
+    for percentile in percentiles:
+        position = (counts - 1) * (percentile / 100)
+        low = np.floor(position).astype(np.intp)
+        high = np.ceil(position).astype(np.intp)
+        fraction = position - low
+        result[percentile] = ordered[starts + low] * (1 - fraction) + ordered[starts + high] * fraction
+    return result
+
+def aggregate(results, by=('size', 'density'), metrics=METRICS, percentiles=PERCENTILES):
+    """Returns one row per group with the episode count, survival rate,
+    deaths by hazard, episodes cut short by a budget and the mean and
+    percentiles of every metric."""
+    if len(results) == 0:
+        return []
+    groups, inverse = group_index(results, by)
+    counts = np.bincount(inverse, minlength=len(groups))
+    columns = {'episodes': counts, 'survival': np.bincount(inverse, results['alive'], len(groups)) / counts}
+    cause = np.asarray(results['cause'])
+    for kind in CAUSES:
+        columns[f'died_{kind}'] = np.bincount(inverse, cause == kind, len(groups)).astype(int)
+    if 'truncated' in results.dtype.names:  # not in results saved before budgets
+        columns['truncated'] = np.bincount(inverse, np.asarray(results['truncated']) != '', len(groups)).astype(int)
+    for metric in metrics:
+        values = np.asarray(results[metric])
+        columns[f'{metric}_mean'] = np.bincount(inverse, values, len(groups)) / counts
+        for percentile, column in grouped_percentiles(values, inverse, counts, percentiles).items():
+            columns[f'{metric}_p{percentile}'] = column
+    rows = []
+    for g in range(len(groups)):
+        row = {key: groups[key][g].item() for key in by}
+        for name, column in columns.items():
+            value = column[g].item()
+            row[name] = round(value, 4) if isinstance(value, float) else value
+        rows.append(row)
+    return rows
+
+def leaderboard(results):
+    """Ranks the configurations (labels) by mean score."""
+    rows = aggregate(results, ('label',), ('point', 'steps', 'inference_seconds'), (50, 90))
+    rows.sort(key=lambda row: -row['point_mean'])
+    return [dict(rank=rank, **row) for rank, row in enumerate(rows, 1)]
+
+def episode_keys(results):
+    key = np.char.add(np.asarray(results['map']), '|')
+    key = np.char.add(np.char.add(key, np.asarray(results['seed']).astype('U')), '|')
+    return np.char.add(key, np.asarray(results['size']).astype('U'))
+
+def compare(baseline, candidate, by=('size', 'density'), metrics=METRICS):
+    """Compares two configurations group by group.
+
+    Means are compared over every episode of each side; wins and the mean
+    score difference only over the episodes both sides ran (same map, seed
+    and size).
+    """
+    rows = []
+    base_rows = {tuple(row[key] for key in by): row for row in aggregate(baseline, by, metrics, (50,))}
+    cand_rows = {tuple(row[key] for key in by): row for row in aggregate(candidate, by, metrics, (50,))}
+    _, base_index, cand_index = np.intersect1d(episode_keys(baseline), episode_keys(candidate),
+                                               return_indices=True)
+    paired = baseline[base_index]
+    difference = np.asarray(candidate['point'])[cand_index] - np.asarray(paired['point'])
+    groups, inverse = group_index(paired, by)
+    paired_groups = {tuple(groups[key][g].item() for key in by): g for g in range(len(groups))}
+    paired_counts = np.bincount(inverse, minlength=len(groups))
+    wins = np.bincount(inverse, difference > 0, len(groups))
+    losses = np.bincount(inverse, difference < 0, len(groups))
+    gains = np.bincount(inverse, difference, len(groups))
+    for key in sorted(set(base_rows) | set(cand_rows)):
+        base, cand = base_rows.get(key, {}), cand_rows.get(key, {})
+        row = dict(zip(by, key))
+        row['episodes'] = f"{base.get('episodes', 0)}/{cand.get('episodes', 0)}"
+        row['survival'] = f"{base.get('survival', 0):.2f}/{cand.get('survival', 0):.2f}"
+        for metric in metrics:
+            a, b = base.get(f'{metric}_mean'), cand.get(f'{metric}_mean')
+            row[f'{metric}_delta'] = round(b - a, 4) if a is not None and b is not None else None
+        g = paired_groups.get(key)
+        row['paired'] = int(paired_counts[g]) if g is not None else 0
+        row['wins'] = int(wins[g]) if g is not None else 0
+        row['losses'] = int(losses[g]) if g is not None else 0
+        row['point_gain'] = round(gains[g] / paired_counts[g], 1) if g is not None else None
+        rows.append(row)
+    return rows
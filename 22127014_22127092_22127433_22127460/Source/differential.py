@@ -0,0 +1,200 @@
+import time
+from kb import BACKENDS, Budgets
+from world import World
+
+COMPARED = ('type', 'cell', 'facing', 'hp', 'point', 'potions', 'percepts')  # event fields both runs must agree on
+SHRINK_BUDGET = 200  # episodes a shrink may run
+
+def parse_config(spec):
+    """Reads a configuration such as 'sympy', 'native+pool' or 'native+plan2'.
+
+    The first part names the backend; +pool answers hazard queries in a
+    process pool and +planN adds the planner searching N actions deep.
+    The pool is off unless asked for: handing a batch to the workers
+    costs more than answering it on the bundled and generated maps.
+    """
+    backend, *options = spec.split('+')
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r} in {spec!r}")
+    config = {'backend': backend, 'pool': False, 'planner': 0}
+    for option in options:
+        if option == 'pool':
+            config['pool'] = True
+        elif option.startswith('plan') and option[4:].isdigit():
+            config['planner'] = int(option[4:])
+        else:
+            raise ValueError(f"unknown option {option!r} in {spec!r}")
+    return config
+
+class Recorder:
+    """Event sink keeping the events in memory."""
+    def __init__(self):
+        self.events = []
+
+    def write(self, event):
+        self.events.append(event)
+
+def recorded(trace, method):
+    def query(*args):
+        answer = method(*args)
+        trace.append((method.__name__, args, answer))
+        return answer
+    return query
+
+class Run:
+    """One configuration exploring one map, one step at a time.
+
+    Every entailment answer the agent acts on and every action it takes is
+    recorded, along with the time spent in its steps. Budgets without any
+    limit make the KB maintenance count steps instead of seconds, so a
+    slower backend is not maintained at other points.
+    """
+    def __init__(self, text, spec):
+        config = parse_config(spec)
+        self.spec = spec
+        self.world = World(text=text)
+        self.world.backend = config['backend']
+        self.world.budgets = Budgets()
+        if config['pool']:
+            from entailment import QueryExecutor
+            self.world.query_executor = QueryExecutor(2)
+        if config['planner']:
+            from planner import Planner
+            self.world.planner = Planner(config['planner'])
+        self.recorder = Recorder()
+        self.world.event_sinks.append(self.recorder)
+        self.trace = []
+        self.seconds = 0.0
+        self.done = False
+        self.error = None
+        started = time.perf_counter()
+        self.world.reset_map()
+        self.agent = self.world.new_agent()
+        self.agent.is_hazard_free = recorded(self.trace, self.agent.is_hazard_free)
+        self.agent.refutes_by_units = recorded(self.trace, self.agent.refutes_by_units)
+        self.steps = self.agent.exploration()
+        self.seconds += time.perf_counter() - started
+
+    def step(self):
+        if self.done:
+            return
+        started = time.perf_counter()
+        try:
+            if next(self.steps, None) is None:
+                self.done = True
+        except Exception as error:
+            self.error = repr(error)
+            self.done = True
+        self.seconds += time.perf_counter() - started
+
+    def actions(self):
+        return [tuple(tuple(event[field]) if isinstance(event[field], list) else event[field] for field in COMPARED)
+                for event in self.recorder.events]
+
+    def close(self):
+        if self.world.query_executor is not None:
+            self.world.query_executor.close()
+        if self.world.planner is not None:
+            self.world.planner.close()
+
+def first_difference(a, b, start):
+    for i in range(start, max(len(a), len(b))):
+        left = a[i] if i < len(a) else None
+        right = b[i] if i < len(b) else None
+        if left != right:
+            return i, left, right
+    return None
+
+def lockstep(text, baseline='sympy', candidate='native'):
+    """Runs both configurations on the map step by step and stops at the
+    first entailment answer or action they disagree on.
+
+    Returns the steps compared, the time each run spent and, on a
+    divergence, what differed.
+    """
+    runs = [Run(text, baseline), Run(text, candidate)]
+    result = {'diverged': False, 'step': 0, 'what': None, 'baseline': None, 'candidate': None}
+    checked = {'entailment': 0, 'action': 0}
+    try:
+        while not all(run.done for run in runs):
+            for run in runs:
+                run.step()
+            result['step'] += 1
+            # Runs that agree have made the same queries and actions after every step
+            for what, a, b in (('entailment', runs[0].trace, runs[1].trace),
+                               ('action', runs[0].actions(), runs[1].actions())):
+                difference = first_difference(a, b, checked[what])
+                if difference is not None:
+                    index, left, right = difference
+                    result.update(diverged=True, what=f"{what} {index}", baseline=left, candidate=right)
+                    break
+                checked[what] = len(a)
+            if result['diverged']:
+                break
+            errors = [run.error for run in runs]
+            if errors[0] != errors[1]:
+                result.update(diverged=True, what='error', baseline=errors[0], candidate=errors[1])
+                break
+        result['queries'] = len(runs[1].trace)
+        result['baseline_seconds'] = runs[0].seconds
+        result['candidate_seconds'] = runs[1].seconds
+    finally:
+        for run in runs:
+            run.close()
+    return result
+
+def read_cells(text):
+    """Returns the map as a square list of rows of cell strings, top row first."""
+    lines = text.splitlines()
+    size = int(lines[0].strip())
+    rows = []
+    for i in range(size):
+        row = lines[i + 1].strip().split('.') if i + 1 < len(lines) else []
+        rows.append((row + ['-'] * size)[:size])
+    return rows
+
+def write_cells(rows):
+    return '\n'.join([str(len(rows))] + ['.'.join(row) for row in rows]) + '\n'
+
+def crop(text, size):
+    """Keeps the size x size corner around the start cell (1, 1)."""
+    rows = read_cells(text)
+    return write_cells([row[:size] for row in rows[len(rows) - size:]])
+
+def shrink(text, baseline='sympy', candidate='native', budget=SHRINK_BUDGET):
+    """Shrinks a map on which the configurations diverge to a smaller one
+    on which they still do: first the smallest corner, then one element
+    at a time is removed until no single removal keeps the divergence."""
+    def diverges(candidate_text):
+        nonlocal budget
+        budget -= 1
+        return lockstep(candidate_text, baseline, candidate)['diverged']
+
+    size = len(read_cells(text))
+    for smaller in range(2, size):
+        if budget <= 0:
+            break
+        cropped = crop(text, smaller)
+        if diverges(cropped):
+            text = cropped
+            break
+    removals = [(i, j, element) for i, row in enumerate(read_cells(text)) for j, cell in enumerate(row)
+                for element in cell.split(' ') if element not in ('', '-', 'A')]
+    removals = list(dict.fromkeys(removals))
+    while removals and budget > 0:
+        # Every removal that keeps the divergence starts the scan over on the smaller map
+        rows = read_cells(text)
+        for i, j, element in removals:
+            if budget <= 0:
+                return text
+            rest = [e for e in rows[i][j].split(' ') if e != element] or ['-']
+            trial = [list(row) for row in rows]
+            trial[i][j] = ' '.join(rest)
+            trial_text = write_cells(trial)
+            if diverges(trial_text):
+                text = trial_text
+                removals.remove((i, j, element))
+                break
+        else:
+            break
+    return text
@@ -0,0 +1,9 @@
+DIRECTIONS = ['NORTH', 'EAST', 'SOUTH', 'WEST']
+OFFSETS = {'NORTH': (1, 0), 'EAST': (0, 1), 'SOUTH': (-1, 0), 'WEST': (0, -1)}
+# Facings as indices into DIRECTIONS, so turning is a table lookup
+FACING = {direction: i for i, direction in enumerate(DIRECTIONS)}
+MOVES = [OFFSETS[direction] for direction in DIRECTIONS]
+TURN_COST = [[min((j - i) % 4, (i - j) % 4) * 10 for j in range(4)] for i in range(4)]
+# Turns from facing i to facing j, +1 right and -1 left; right wins a tie
+TURNS = [[(1,) * ((j - i) % 4) if (j - i) % 4 <= (i - j) % 4 else (-1,) * ((i - j) % 4) for j in range(4)]
+         for i in range(4)]
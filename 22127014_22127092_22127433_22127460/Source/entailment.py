@@ -0,0 +1,161 @@
+import operator
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from kb import Budget, BudgetExceeded, refute
+
+LOG_SIZE = 1 << 16  # int32 slots of the first clause log block
+
+def encode_clause(clause, names):
+    """Returns the clause as its signed 1-based symbol indices followed by a
+    0, adding new symbols to names."""
+    encoded = []
+    for name, value in sorted(clause):
+        index = names.setdefault(name, len(names) + 1)
+        encoded.append(index if value else -index)
+    encoded.append(0)
+    return encoded
+
+def decode_clauses(array):
+    clauses = []
+    clause = []
+    for literal in array.tolist():
+        if literal == 0:
+            clauses.append(frozenset(clause))
+            clause = []
+        else:
+            clause.append(literal)
+    return clauses
+
+_log = {}  # per worker process: the clause log block and the clauses decoded from it
+
+def start_worker():
+    """Pool initializer; a worker starts with nothing decoded."""
+    _log.update(name=None, block=None, read=0, clauses=[])
+
+def read_log(block_name, length):
+    # The log only grows and a larger block starts with a copy of the old
+    # one, so only what was appended since the last task is decoded
+    if _log['name'] != block_name:
+        if _log['block'] is not None:
+            _log['block'].close()
+        _log['block'] = shared_memory.SharedMemory(name=block_name)
+        _log['name'] = block_name
+    if _log['read'] < length:
+        array = np.ndarray((length,), dtype=np.int32, buffer=_log['block'].buf)
+        _log['clauses'].extend(decode_clauses(array[_log['read']:]))
+        del array
+        _log['read'] = length
+    return _log['clauses']
+
+def refute_chunk(block_name, length, present, literals, resolvents=None, seconds=None):
+    """Returns (answer, resolvents used) per literal against the logged
+    clauses numbered in present; the answer is None when the query ran
+    out of its budget.
+
+    Every query may derive resolvents; the seconds are shared by the
+    whole chunk.
+    """
+    logged = read_log(block_name, length)
+    clauses = [logged[i] for i in present]
+    deadline = time.perf_counter() + seconds if seconds is not None else None
+    answers = []
+    for literal in literals:
+        budget = Budget(resolvents)
+        budget.deadline = deadline
+        try:
+            answers.append((refute(clauses, literal, operator.neg, budget), budget.used))
+        except BudgetExceeded:
+            answers.append((None, budget.used))
+    return answers
+
+class QueryExecutor:
+    """Answers many entailment queries against one KB in worker processes.
+
+    Every clause the KB ever held is appended once to a clause log in
+    shared memory that workers only read. A batch then sends the numbers
+    of the clauses in the current KB, and each worker decodes only the
+    clauses appended since its last batch.
+    """
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.names = {}  # symbol -> 1-based index, kept across KB versions
+        self.positions = {}  # clause -> its number in the log
+        self.log = None
+        self.length = 0  # int32 slots of the log in use
+
+    def append(self, clauses):
+        encoded = []
+        for clause in clauses:
+            if clause not in self.positions:
+                self.positions[clause] = len(self.positions)
+                encoded.extend(encode_clause(clause, self.names))
+        if not encoded:
+            return
+        needed = self.length + len(encoded)
+        if self.log is None or needed * 4 > self.log.size:
+            block = shared_memory.SharedMemory(create=True, size=max(LOG_SIZE, 2 * needed) * 4)
+            if self.log is not None:
+                block.buf[:self.length * 4] = self.log.buf[:self.length * 4]
+                self.close_log()
+            self.log = block
+        log = np.ndarray((needed,), dtype=np.int32, buffer=self.log.buf)
+        log[self.length:] = encoded
+        del log
+        self.length = needed
+
+    def refute_all(self, clauses, literals, budget=None):
+        """Returns {(name, value): True when the clauses entail the opposite literal}.
+
+        With a budget, the resolvents left are split evenly between the
+        queries and the time left is shared by the chunks, which run at
+        once; a query answers None when its share runs out, and every query
+        does when there is less than one resolvent each. The resolvents of
+        all of them are charged.
+        """
+        results = {literal: False for literal in literals}
+        self.append(clauses)
+        # A symbol no clause mentions can take either value
+        queries = [literal for literal in literals if literal[0] in self.names]
+        if not queries:
+            return results
+        encoded = [self.names[name] if value else -self.names[name] for name, value in queries]
+        present = [self.positions[clause] for clause in clauses]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=start_worker)
+        chunks = min(self.workers, len(encoded))
+        limits = (None, None)
+        if budget is not None:
+            share = budget.resolvents // len(encoded) if budget.resolvents is not None else None
+            if share == 0:
+                # Too little for every query; asked one at a time they can use all of it
+                results.update((literal, None) for literal in queries)
+                return results
+            limits = (share, budget.remaining_seconds())
+        answers = self.executor.map(refute_chunk, [self.log.name] * chunks, [self.length] * chunks,
+                                    [present] * chunks, [encoded[i::chunks] for i in range(chunks)],
+                                    [limits[0]] * chunks, [limits[1]] * chunks)
+        for i, chunk in enumerate(answers):
+            for literal, (proven, used) in zip(queries[i::chunks], chunk):
+                results[literal] = proven
+                if budget is not None:
+                    budget.used += used
+        return results
+
+    def close_log(self):
+        self.log.close()
+        self.log.unlink()
+        self.log = None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.log is not None:
+            self.close_log()
+        self.names.clear()
+        self.positions.clear()
+        self.length = 0
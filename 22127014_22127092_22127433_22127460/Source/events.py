@@ -0,0 +1,162 @@
+import abc
+import json
+import queue
+import struct
+import threading
+from kb import PERCEPTS
+
+EVENT_TYPES = ('step', 'move', 'turn', 'bump', 'shoot', 'scream', 'gold', 'potion', 'heal', 'risk', 'maintain',
+               'backtrack', 'return', 'exit', 'climb', 'die', 'truncate', 'start')
+FACINGS = ('NORTH', 'EAST', 'SOUTH', 'WEST')
+MAGIC = b'WMPE'
+VERSION = 2  # 2 added the agent id
+HEADER = struct.Struct('<4sH')  # magic, format version
+# step, point, KB size, queries, inference microseconds, x, y, hp, type, facing, percepts, potions, agent
+RECORD = struct.Struct('<IiIIIHHhBBBBB')
+FIELDS = ('step', 'point', 'KB_size', 'queries', 'inference_us', 'x', 'y', 'hp', 'type', 'facing', 'percepts',
+          'potions', 'agent')
+BATCH_SIZE = 1024  # events written to the file at once
+
+def percept_mask(percepts):
+    mask = 0
+    for i, percept in enumerate(PERCEPTS):
+        if percept in percepts:
+            mask |= 1 << i
+    return mask
+
+def mask_percepts(mask):
+    return [percept for i, percept in enumerate(PERCEPTS) if mask & (1 << i)]
+
+class EventSink(abc.ABC):
+    """Writes events from a background thread.
+
+    write() only puts the event on an unbounded queue, so the agent loop
+    never waits on the file, however far the writer falls behind. close()
+    drains the queue, closes the file and raises any error the writer hit;
+    events written after the error are dropped.
+    """
+    mode = 'w'
+
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.file = open(path, self.mode)
+        self.queue = queue.SimpleQueue()
+        self.count = 0
+        self.error = None
+        self.thread = threading.Thread(target=self.drain, daemon=True)
+        self.thread.start()
+
+    def write(self, event):
+        if self.error is None:
+            self.queue.put_nowait(event)
+
+    def drain(self):
+        done = False
+        try:
+            self.start()
+        except Exception as error:
+            self.error = error
+        while not done:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if batch and self.error is None:
+                try:
+                    self.file.write(self.encode(batch))
+                    self.count += len(batch)
+                except Exception as error:
+                    # Keep taking events off the queue so it does not grow until close()
+                    self.error = error
+        self.file.close()
+
+    def start(self):
+        pass
+
+    @abc.abstractmethod
+    def encode(self, events):
+        """Returns the text or bytes of a batch of events."""
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JSONLSink(EventSink):
+    """One JSON object per line."""
+    def encode(self, events):
+        return ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events)
+
+class BinarySink(EventSink):
+    """Fixed-size little-endian records after a short header; see RECORD.
+
+    Only the numeric fields are kept: cells and facings as numbers, the
+    percepts as a bit mask in PERCEPTS order.
+    """
+    mode = 'wb'
+
+    def start(self):
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+
+    def encode(self, events):
+        return b''.join(RECORD.pack(
+            event['step'], event['point'], event['KB_size'], event['queries'],
+            int(event['inference_seconds'] * 1e6), event['cell'][0], event['cell'][1], event['hp'],
+            EVENT_TYPES.index(event['type']), FACINGS.index(event['facing']), percept_mask(event['percepts']),
+            event['potions'], event['agent']) for event in events)
+
+def open_sink(path):
+    """Returns a binary sink for a .bin path, a JSON lines sink otherwise."""
+    return BinarySink(path) if path.endswith('.bin') else JSONLSink(path)
+
+def read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
+
+def read_binary(path):
+    """Yields the events of a binary log in the form they were written."""
+    with open(path, 'rb') as f:
+        magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("not a Wumpus World event log")
+        if version != VERSION:
+            raise ValueError(f"unsupported event log version {version}")
+        while True:
+            chunk = f.read(RECORD.size * BATCH_SIZE)
+            if not chunk:
+                break
+            for values in RECORD.iter_unpack(chunk[:len(chunk) - len(chunk) % RECORD.size]):
+                record = dict(zip(FIELDS, values))
+                yield {
+                    'agent': record['agent'],
+                    'step': record['step'],
+                    'type': EVENT_TYPES[record['type']],
+                    'cell': (record['x'], record['y']),
+                    'facing': FACINGS[record['facing']],
+                    'hp': record['hp'],
+                    'point': record['point'],
+                    'potions': record['potions'],
+                    'percepts': mask_percepts(record['percepts']),
+                    'KB_size': record['KB_size'],
+                    'queries': record['queries'],
+                    'inference_seconds': record['inference_us'] / 1e6,
+                }
+
+def read_events(path):
+    return read_binary(path) if path.endswith('.bin') else read_jsonl(path)
@@ -0,0 +1,78 @@
+import numpy as np
+import events
+
+# Same layout as events.RECORD, so binary logs load without parsing
+EVENT_DTYPE = np.dtype([
+    ('step', '<u4'), ('point', '<i4'), ('KB_size', '<u4'), ('queries', '<u4'), ('inference_us', '<u4'),
+    ('x', '<u2'), ('y', '<u2'), ('hp', '<i2'), ('type', 'u1'), ('facing', 'u1'), ('percepts', 'u1'),
+    ('potions', 'u1'), ('agent', 'u1'),
+])
+assert EVENT_DTYPE.itemsize == events.RECORD.size
+KINDS = ('visits', 'deaths', 'inference')
+COLORS = {'visits': (0, 90, 255), 'deaths': (220, 0, 0), 'inference': (255, 140, 0)}
+MOVE = events.EVENT_TYPES.index('move')
+DIE = events.EVENT_TYPES.index('die')
+START = events.EVENT_TYPES.index('start')
+
+def load_trajectory(path):
+    """Returns the events of one log as an array of EVENT_DTYPE."""
+    if path.endswith('.bin'):
+        with open(path, 'rb') as f:
+            magic, version = events.HEADER.unpack(f.read(events.HEADER.size))
+        if magic != events.MAGIC or version != events.VERSION:
+            raise ValueError(f"{path} is not a Wumpus World event log")
+        return np.fromfile(path, dtype=EVENT_DTYPE, offset=events.HEADER.size)
+    records = list(events.read_jsonl(path))
+    array = np.zeros(len(records), dtype=EVENT_DTYPE)
+    if records:
+        array['agent'] = [event['agent'] for event in records]
+        array['x'] = [event['cell'][0] for event in records]
+        array['y'] = [event['cell'][1] for event in records]
+        array['type'] = [events.EVENT_TYPES.index(event['type']) for event in records]
+        array['inference_us'] = [int(event['inference_seconds'] * 1e6) for event in records]
+    return array
+
+class Heatmaps:
+    """Visit, death and inference time counts per cell over many episodes.
+
+    Grids are indexed [x - 1, y - 1] like the agent's cells. The start
+    event counts as a visit of the start cell, which no move enters. Inference
+    time between two events is charged to the cell of the first one,
+    where the agent stood while it queried the KB. Agents of a team share
+    one log, and their inference times are cumulative each, so the time is
+    taken between consecutive events of the same agent.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.grids = {kind: np.zeros((size, size)) for kind in KINDS}
+        self.episodes = 0
+
+    def add(self, trajectory):
+        x = trajectory['x'].astype(np.intp) - 1
+        y = trajectory['y'].astype(np.intp) - 1
+        inside = (x >= 0) & (x < self.size) & (y >= 0) & (y < self.size)
+        for kind, mask in (('visits', np.isin(trajectory['type'], (MOVE, START))), ('deaths', trajectory['type'] == DIE)):
+            mask &= inside
+            np.add.at(self.grids[kind], (x[mask], y[mask]), 1)
+        order = np.argsort(trajectory['agent'], kind='stable')
+        agent, x, y, inside = trajectory['agent'][order], x[order], y[order], inside[order]
+        spent = np.diff(trajectory['inference_us'][order].astype(np.int64)) / 1e6
+        before = inside[:-1] & (agent[:-1] == agent[1:])
+        np.add.at(self.grids['inference'], (x[:-1][before], y[:-1][before]), spent[before])
+        self.episodes += 1
+
+    def add_files(self, paths):
+        for path in paths:
+            self.add(load_trajectory(path))
+        return self
+
+    def normalized(self, kind):
+        grid = self.grids[kind]
+        top = grid.max()
+        return grid / top if top > 0 else grid
+
+    def text(self, kind):
+        """The grid as rows of numbers, top row first like the window."""
+        grid = self.grids[kind]
+        fmt = '{:7.3f}' if kind == 'inference' else '{:7.0f}'
+        return '\n'.join(' '.join(fmt.format(value) for value in grid[x - 1]) for x in range(self.size, 0, -1))
@@ -0,0 +1,273 @@
+import collections
+import threading
+import time
+
+HAZARDS = ('P', 'W', 'P_G')
+PERCEPTS = ('B', 'S', 'W_H', 'G_L')
+BACKENDS = ('native', 'sympy')
+CLOCK_INTERVAL = 256  # resolvents between two reads of the clock
+
+class BudgetExceeded(Exception):
+    pass
+
+class Budget:
+    """Resolvents and seconds one query may use; None is no limit.
+
+    used counts the resolvents the query made, whether or not it finished.
+    """
+    def __init__(self, resolvents=None, seconds=None):
+        self.resolvents = resolvents
+        self.deadline = time.perf_counter() + seconds if seconds is not None else None
+        self.used = 0
+
+    def check(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise BudgetExceeded('inference time')
+
+    def spend(self):
+        # Raised before the resolvent is counted, so a query never uses more than it was given
+        if self.resolvents is not None and self.used >= self.resolvents:
+            raise BudgetExceeded('resolvent')
+        self.used += 1
+        # Reading the clock for every resolvent would cost more than resolving
+        if self.deadline is not None and self.used % CLOCK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise BudgetExceeded('inference time')
+
+    def remaining_seconds(self):
+        return self.deadline - time.perf_counter() if self.deadline is not None else None
+
+class Budgets:
+    """Limits of an agent per step and per episode; None leaves a limit off.
+
+    Resolvent and step limits cut an episode at the same point on every
+    run; time limits depend on the machine.
+    """
+    def __init__(self, step_seconds=None, step_resolvents=None, episode_seconds=None, episode_resolvents=None,
+                 steps=None):
+        self.step_seconds = step_seconds
+        self.step_resolvents = step_resolvents
+        self.episode_seconds = episode_seconds
+        self.episode_resolvents = episode_resolvents
+        self.steps = steps
+
+class Knowledge:
+    """Clause store, fluent tags and safety cache of a KB.
+
+    Agents exploring the same world can share one instance; lock guards
+    every change to it.
+    """
+    def __init__(self, backend='native'):
+        self.backend = get_backend(backend)
+        self.KB = self.backend.empty()
+        self.KB_tags = collections.defaultdict(set)  # tag -> clauses asserted under it
+        self.clause_tags = collections.defaultdict(set)  # clause -> tags still asserting it
+        self.safety_cache = {}
+        self.KB_size_mark = 0
+        self.KB_time_mark = time.time()
+        self.lock = threading.RLock()
+
+def symbol_name(kind, cell):
+    """Returns the KB symbol name for a kind of fact at a cell, e.g. P_G_1_10."""
+    x, y = cell
+    return f'{kind}_{x}_{y}'
+
+def parse_symbol(name):
+    """Splits a symbol name back into its kind and cell."""
+    kind, x, y = name.rsplit('_', 2)
+    return kind, (int(x), int(y))
+
+def unit(name, value=True):
+    return frozenset([(name, value)])
+
+def equivalence(name, names):
+    """Returns the clauses of name <=> (names[0] or names[1] or ...)."""
+    return [frozenset([(name, False)] + [(other, True) for other in names])] + \
+           [frozenset([(name, True), (other, False)]) for other in names]
+
+def negate(literal):
+    name, value = literal
+    return name, not value
+
+def clause_order(clause):
+    """Sort key that orders clauses the same way whatever the hash seed."""
+    return sorted(clause)
+
+def refute(clauses, literal, negate=negate, budget=None):
+    """Set-of-support resolution: True when clauses together with literal
+    are unsatisfiable.
+
+    Clauses are resolved in the order given, so a budget runs out at the
+    same resolvent on every run; sets iterate in hash order, which changes
+    from one process to the next. Only clauses added in the last round are
+    resolved, pairs among older clauses were resolved in earlier rounds.
+    Raises BudgetExceeded once the budget runs out.
+    """
+    if budget is not None:
+        budget.check()
+    fresh = [frozenset([literal])]
+    indexed = list(clauses) + fresh
+    clauses = set(indexed)
+    clausesWith = collections.defaultdict(list)
+    while fresh:
+        for clause in indexed:
+            for other in clause:
+                clausesWith[other].append(clause)
+        new = []
+        for Ci in fresh:
+            for other in sorted(Ci):
+                for Cj in clausesWith[negate(other)]:
+                    resolvent = (Ci - {other}) | (Cj - {negate(other)})
+                    if any(negate(rest) in resolvent for rest in resolvent):
+                        continue
+                    if not resolvent:
+                        return True
+                    if budget is not None:
+                        budget.spend()
+                    new.append(resolvent)
+        fresh = []
+        for clause in new:
+            if clause not in clauses:
+                clauses.add(clause)
+                fresh.append(clause)
+        indexed = fresh
+    return False
+
+class NativeBackend:
+    """KB as a frozenset of clauses of (name, value) pairs."""
+    name = 'native'
+
+    def __init__(self):
+        self.ordered = (frozenset(), ())  # last KB made here and its clauses in order
+
+    def empty(self):
+        return frozenset()
+
+    def conjoin(self, KB, clauses):
+        result = KB.union(clauses)
+        ordered_KB, ordered = self.ordered
+        if ordered_KB is KB:
+            added = dict.fromkeys(clause for clause in clauses if clause not in KB)
+            self.ordered = (result, ordered + tuple(added))
+        return result
+
+    def remove(self, KB, clauses):
+        result = KB.difference(clauses)
+        ordered_KB, ordered = self.ordered
+        if ordered_KB is KB:
+            self.ordered = (result, tuple(clause for clause in ordered if clause in result))
+        return result
+
+    def clauses(self, KB):
+        """The clauses in the order they were told; a KB this backend did
+        not build clause by clause is sorted by clause_order instead."""
+        ordered_KB, ordered = self.ordered
+        if ordered_KB is not KB:
+            ordered = tuple(sorted(KB, key=clause_order))
+            self.ordered = (KB, ordered)
+        return ordered
+
+    def from_clauses(self, clauses):
+        return frozenset(clauses)
+
+    def from_ordered(self, clauses):
+        """A KB of clauses that keep the given order, as if told one by one."""
+        KB = frozenset(clauses)
+        self.ordered = (KB, tuple(dict.fromkeys(clauses)))
+        return KB
+
+    def size(self, KB):
+        return len(KB)
+
+    def entails(self, KB, literal, budget=None):
+        return refute(self.clauses(KB), negate(literal), budget=budget)
+
+def get_backend(name='native'):
+    if name == 'native':
+        return NativeBackend()
+    if name == 'sympy':
+        # Only this backend needs sympy, which is slow to import
+        from sympy_backend import SympyBackend
+        return SympyBackend()
+    raise ValueError(f"unknown inference backend {name!r}")
+
+def linked_names(clauses, names):
+    """Returns names and every symbol a chain of clauses links to them."""
+    linked = set(names)
+    by_name = collections.defaultdict(list)
+    for clause in clauses:
+        for name, _ in clause:
+            by_name[name].append(clause)
+    pending = list(linked)
+    while pending:
+        for clause in by_name.pop(pending.pop(), ()):
+            for name, _ in clause:
+                if name not in linked:
+                    linked.add(name)
+                    pending.append(name)
+    return linked
+
+def propagate_units(clauses, known=()):
+    """Simplifies clauses with every unit literal until no new unit appears.
+
+    Returns (units, clauses) where units maps symbol names to their value and
+    clauses holds the remaining non-unit clauses, or None on a contradiction.
+    """
+    units = {}
+    pending = list(known) + [next(iter(clause)) for clause in clauses if len(clause) == 1]
+    clauses = set(clause for clause in clauses if len(clause) > 1)
+    while pending:
+        for name, value in pending:
+            if units.get(name, value) != value:
+                return None
+            units[name] = value
+        pending = []
+        reduced = set()
+        for clause in clauses:
+            if any(units.get(name) == value for name, value in clause):
+                continue
+            clause = frozenset(literal for literal in clause if literal[0] not in units)
+            if not clause:
+                return None
+            if len(clause) == 1:
+                pending.append(next(iter(clause)))
+            else:
+                reduced.add(clause)
+        clauses = reduced
+    return units, clauses
+
+def remove_subsumed(clauses):
+    """Drops every clause that is a superset of another clause."""
+    kept = []
+    occurs = collections.defaultdict(list)
+    for clause in sorted(clauses, key=len):
+        counts = collections.Counter(i for literal in clause for i in occurs[literal])
+        if any(count == len(kept[i]) for i, count in counts.items()):
+            continue
+        for literal in clause:
+            occurs[literal].append(len(kept))
+        kept.append(clause)
+    return kept
+
+def simplify_clauses(clauses, known=(), frozen=()):
+    """Deduplicates, propagates units, removes subsumed clauses and forgets
+    percept units that no remaining clause refers to.
+
+    Percept symbols are only ever asserted together with their biconditional
+    in update_KB, so forgetting their unit loses nothing that a later visit
+    would not re-add. A contradictory KB only gets the steps that keep it
+    equivalent: deduplication and subsumption. Frozen clauses may be
+    retracted later, so nothing is derived from them and they are returned
+    as they are.
+    """
+    frozen = set(frozen)
+    clauses = [clause for clause in clauses if clause not in frozen]
+    result = propagate_units(clauses, known)
+    if result is None:
+        return remove_subsumed(set(clauses)) + list(frozen)
+    units, clauses = result
+    clauses = remove_subsumed(clauses)
+    mentioned = set(name for clause in clauses + list(frozen) for name, _ in clause)
+    for name, value in units.items():
+        if name in mentioned or parse_symbol(name)[0] not in PERCEPTS:
+            clauses.append(frozenset([(name, value)]))
+    return clauses + list(frozen)
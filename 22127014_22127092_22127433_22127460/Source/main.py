@@ -1,8 +1,546 @@
-from program import Program
-from sympy import symbols, Not, And, Or, Implies, Equivalent
-from sympy.logic.boolalg import to_cnf
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from kb import BACKENDS, Budgets, get_backend
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FORMATS = ('text', 'json', 'csv')
+RESULT_FIELDS = ('label', 'map', 'seed', 'size', 'density', 'backend', 'point', 'hp', 'potions', 'potions_found',
+                 'potions_used', 'alive', 'cause', 'steps', 'visited', 'queries', 'resolvents', 'inference_seconds', 'seconds',
+                 'truncated')
+HEADLESS_COMMANDS = ('sim', 'batch', 'bench', 'team', 'report', 'compare', 'diff')  # never open the window
+BENCH_FIELDS = ('map', 'seed', 'backend', 'runs', 'steps', 'best_seconds', 'mean_seconds', 'steps_per_second')
+
+def load(headless=False, backend='native'):
+    """Imports what a run needs and returns its world class: pygame only
+    with a window, sympy only with the sympy backend."""
+    get_backend(backend)
+    if headless:
+        from world import World
+        return World
+    from program import Program
+    return Program
+
+def profile_import(headless=False, backend='native'):
+    """Prints the import time of every module a run loads, with the modules
+    each of them imports directly."""
+    import subprocess
+    code = f"import main; main.load({headless!r}, {backend!r})"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            cwd=BASE_DIR)
+    rows = []
+    for line in result.stderr.splitlines():
+        fields = line[len('import time:'):].split('|')
+        if not line.startswith('import time:') or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2][1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(fields[0]), int(fields[1])))
+    tops = [i for i, (depth, name, _, _) in enumerate(rows) if depth == 0]
+    if not any(rows[i][1] == 'main' for i in tops):
+        print(result.stderr)
+        return
+    # Interpreter start-up imports finish before the ones main makes
+    first = next(i for i in tops if rows[i][1] == 'main')
+    rows = rows[max([i for i in tops if i < first], default=-1) + 1:]
+    total = sum(cumulative for depth, _, _, cumulative in rows if depth == 0)
+    print(f"{'module':<40} {'self ms':>8} {'total ms':>9}")
+    # Rows are listed as imports finish, so a module follows what it imported
+    for depth, name, self_us, cumulative in rows:
+        if depth <= 1:
+            print(f"{'  ' * depth + name:<40} {self_us / 1000:>8.1f} {cumulative / 1000:>9.1f}")
+    print(f"{'total':<40} {'':>8} {total / 1000:>9.1f}")
+
+def resolve_map(path):
+    """Finds a map given relative to the working directory or to this directory."""
+    if os.path.exists(path):
+        return path
+    candidate = os.path.join(BASE_DIR, path)
+    return candidate if os.path.exists(candidate) else path
+
+def make_world(world_class, map_file=None, size=10, seed=None, backend='native', risk=False, planner=0,
+               budgets=None, pool=0):
+    """Loads map_file, or generates a size x size map from seed without one.
+
+    risk adds the probabilistic risk model, planner the lookahead planner
+    searching that many actions deep, budgets the agent's limits and pool
+    the number of worker processes answering hazard queries.
+    """
+    if map_file is None:
+        from maps import generate_map
+        world = world_class(text=generate_map(size, seed))
+    else:
+        world = world_class(resolve_map(map_file))
+    world.backend = backend
+    if risk:
+        from risk import RiskModel
+        world.risk_model = RiskModel(seed=seed)
+    if planner:
+        from planner import Planner
+        world.planner = Planner(planner)
+    if pool:
+        from entailment import QueryExecutor
+        world.query_executor = QueryExecutor(pool)
+    world.budgets = budgets
+    return world
+
+def close_world(world):
+    """Stops the worker processes of the planner and the query pool."""
+    if world.planner is not None:
+        world.planner.close()
+    if world.query_executor is not None:
+        world.query_executor.close()
+
+def make_budgets(args):
+    """Returns the Budgets the options ask for, None without any."""
+    limits = (args.step_seconds, args.step_resolvents, args.episode_seconds, args.episode_resolvents, args.max_steps)
+    if all(limit is None for limit in limits):
+        return None
+    return Budgets(*limits)
+
+def config_label(args):
+    """Names the agent configuration results are grouped by."""
+    if args.label:
+        return args.label
+    return args.backend + ('+risk' if args.risk else '') + (f'+plan{args.planner}' if args.planner else '') + \
+        (f'+pool{args.pool}' if args.pool else '')
+
+def episode_specs(args):
+    """Returns (map, size, seed) of every episode a batch or bench asks for."""
+    specs = [(map_file, args.size, None) for map_file in args.maps]
+    first = args.seed if args.seed is not None else 0
+    specs += [(None, args.size, seed) for seed in range(first, first + args.count)]
+    return specs or [(None, args.size, first)]
+
+def event_paths(path, count):
+    """Numbers the event log of each of count episodes after path."""
+    if path is None:
+        return [None] * count
+    if count == 1:
+        return [path]
+    root, ext = os.path.splitext(path)
+    return [f'{root}-{i}{ext}' for i in range(count)]
+
+def run_episode(map_file=None, size=10, seed=None, backend='native', callbacks=(), events=None, risk=False,
+                planner=0, label=None, budgets=None, pool=0, resume=None):
+    """Runs one headless episode and returns its result record.
+
+    With events, the episode's event stream is written to that file. An
+    existing snapshot file resume continues the episode from where it was
+    saved; seconds then only counts the resumed part.
+    """
+    world = make_world(load(True, backend), map_file, size, seed, backend, risk, planner, budgets, pool)
+    world.step_callbacks.extend(callbacks)
+    density = world.hazard_density()
+    agent, frontier = None, None
+    if resume is not None and os.path.exists(resume):
+        import snapshot
+        agent, frontier = snapshot.load(resume, world)
+    started = time.perf_counter()
+    try:
+        if events is not None:
+            from events import open_sink
+            with open_sink(events) as sink:
+                world.event_sinks.append(sink)
+                agent = world.run(agent, frontier)
+        else:
+            agent = world.run(agent, frontier)
+    finally:
+        close_world(world)
+    return {
+        'label': label or backend,
+        'map': map_file if map_file is not None else f'random-{size}',
+        'seed': seed,
+        'size': world.size,
+        'density': round(density, 4),
+        'backend': backend,
+        'point': agent.point,
+        'hp': agent.hp,
+        'potions': agent.available_hp,
+        'potions_found': agent.potions_found,
+        'potions_used': agent.potions_used,
+        'alive': agent.alive,
+        'cause': agent.cause or '',
+        'steps': agent.steps,
+        'visited': len(agent.visited),
+        'queries': agent.queries,
+        'resolvents': agent.resolvents,
+        'inference_seconds': round(agent.inference_time, 4),
+        'seconds': round(time.perf_counter() - started, 3),
+        'truncated': agent.truncated or '',
+    }
+
+class ResultWriter:
+    """Writes result records as they come, as a text table, JSON lines or CSV."""
+    def __init__(self, fields, output_format='text', out=None):
+        self.fields = fields
+        self.format = output_format
+        self.out = out if out is not None else sys.stdout
+        self.csv = csv.DictWriter(self.out, fields) if output_format == 'csv' else None
+        self.rows = 0
+
+    def write(self, record):
+        if self.rows == 0:
+            if self.format == 'text':
+                print(' '.join(f'{field:>{max(12, len(field))}}' for field in self.fields), file=self.out)
+            elif self.format == 'csv':
+                self.csv.writeheader()
+        if self.format == 'json':
+            print(json.dumps({field: record[field] for field in self.fields}), file=self.out)
+        elif self.format == 'csv':
+            self.csv.writerow({field: record[field] for field in self.fields})
+        else:
+            print(' '.join(f'{str(record[field]):>{max(12, len(field))}}' for field in self.fields), file=self.out)
+        self.out.flush()
+        self.rows += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+def command_run(args):
+    world = make_world(load(False, args.backend), args.map, args.size, args.seed, args.backend, args.risk, args.planner,
+                       make_budgets(args), args.pool)
+    world.step_delay = args.delay
+    try:
+        if args.events:
+            from events import open_sink
+            with open_sink(args.events) as sink:
+                world.event_sinks.append(sink)
+                world.run()
+        else:
+            world.run()
+    finally:
+        close_world(world)
+
+def command_sim(args):
+    callbacks = []
+    if args.checkpoint:
+        from snapshot import Checkpointer
+        callbacks.append(Checkpointer(args.checkpoint, args.every))
+    record = run_episode(args.map, args.size, args.seed, args.backend, callbacks, args.events, args.risk,
+                         args.planner, config_label(args), make_budgets(args), args.pool)
+    ResultWriter(RESULT_FIELDS, args.format).write(record)
+
+def finished_episodes(path):
+    """Returns {episode number: result record} of a batch's results file.
+
+    A line cut short by an interruption is left out, so that episode runs again.
+    """
+    finished = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                finished[record.pop('episode')] = record
+    return finished
+
+def command_batch(args):
+    writer = ResultWriter(RESULT_FIELDS, args.format)
+    specs = episode_specs(args)
+    events = event_paths(args.events, len(specs))
+    config = (args.risk, args.planner, config_label(args), make_budgets(args), args.pool)
+    finished = {}
+    if args.checkpoint:
+        from snapshot import Checkpointer
+        os.makedirs(args.checkpoint, exist_ok=True)
+        results = os.path.join(args.checkpoint, 'results.jsonl')
+        finished = finished_episodes(results)
+        # Rewritten without a line cut short, which new results would be appended to
+        with open(results + '.tmp', 'w') as f:
+            f.writelines(json.dumps(dict(record, episode=i)) + '\n' for i, record in finished.items())
+        os.replace(results + '.tmp', results)
+
+    def episode(i):
+        # The arguments of run_episode, which worker processes get pickled
+        map_file, size, seed = specs[i]
+        if not args.checkpoint:
+            return (map_file, size, seed, args.backend, (), events[i], *config)
+        snapshot = os.path.join(args.checkpoint, f'episode-{i}.snap')
+        return (map_file, size, seed, args.backend, (Checkpointer(snapshot, args.every),), events[i], *config,
+                snapshot)
+
+    def finish(i, record):
+        if args.checkpoint:
+            with open(results, 'a') as f:
+                f.write(json.dumps(dict(record, episode=i)) + '\n')
+            snapshot = os.path.join(args.checkpoint, f'episode-{i}.snap')
+            if os.path.exists(snapshot):
+                os.remove(snapshot)
+        return record
+
+    records = []
+    pending = [i for i in range(len(specs)) if i not in finished]
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(args.workers) as executor:
+            futures = {i: executor.submit(run_episode, *episode(i)) for i in pending}
+            for i in range(len(specs)):
+                records.append(finished[i] if i in finished else finish(i, futures[i].result()))
+                writer.write(records[-1])
+    else:
+        for i in range(len(specs)):
+            records.append(finished[i] if i in finished else finish(i, run_episode(*episode(i))))
+            writer.write(records[-1])
+    if args.save:
+        from analysis import save_results
+        save_results(records, args.save)
+
+def command_bench(args):
+    writer = ResultWriter(BENCH_FIELDS, args.format)
+    for map_file, size, seed in episode_specs(args):
+        runs = [run_episode(map_file, size, seed, args.backend, (), None, args.risk, args.planner, None,
+                            make_budgets(args), args.pool)
+                for _ in range(args.repeat)]
+        seconds = [run['seconds'] for run in runs]
+        mean = sum(seconds) / len(seconds)
+        writer.write({
+            'map': runs[0]['map'],
+            'seed': seed,
+            'backend': args.backend,
+            'runs': len(runs),
+            'steps': runs[0]['steps'],
+            'best_seconds': min(seconds),
+            'mean_seconds': round(mean, 3),
+            'steps_per_second': round(runs[0]['steps'] / mean, 1) if mean > 0 else None,
+        })
+
+def command_team(args):
+    from team import TEAM_FIELDS, cover
+    writer = ResultWriter(TEAM_FIELDS, args.format)
+    # Every team explores the same map, so a generated one needs a fixed seed
+    seed = args.seed if args.seed is not None else 0
+    for count, path in zip(args.agents, event_paths(args.events, len(args.agents))):
+        world = make_world(load(True, args.backend), args.map, args.size, seed, args.backend, args.risk, args.planner,
+                           make_budgets(args), args.pool)
+        try:
+            if path is not None:
+                from events import open_sink
+                with open_sink(path) as sink:
+                    world.event_sinks.append(sink)
+                    record = cover(world, count, args.threaded)
+            else:
+                record = cover(world, count, args.threaded)
+        finally:
+            close_world(world)
+        writer.write(record)
+
+def command_replay(args):
+    import snapshot
+    world = load(args.headless, args.backend)()
+    world.backend = args.backend
+    world.budgets = make_budgets(args)
+    agent, frontier = snapshot.load(args.snapshot, world)
+    if not args.headless:
+        world.step_delay = args.delay
+        world.set_screen_size()
+    if args.events:
+        from events import open_sink
+        with open_sink(args.events) as sink:
+            world.event_sinks.append(sink)
+            world.run(agent, frontier)
+    else:
+        world.run(agent, frontier)
+    if args.headless:
+        ResultWriter(('point', 'hp', 'alive', 'steps', 'visited'), args.format).write(
+            {'point': agent.point, 'hp': agent.hp, 'alive': agent.alive, 'steps': agent.steps,
+             'visited': len(agent.visited)})
+
+def command_report(args):
+    import analysis
+    results = analysis.load_results(*args.results)
+    rows = analysis.leaderboard(results)
+    if rows:
+        ResultWriter(tuple(rows[0]), args.format).write_all(rows)
+    rows = analysis.aggregate(results, tuple(args.by))
+    if rows:
+        if args.format == 'text':
+            print()
+        ResultWriter(tuple(rows[0]), args.format).write_all(rows)
+
+def command_compare(args):
+    import analysis
+    rows = analysis.compare(analysis.load_results(args.baseline), analysis.load_results(args.candidate),
+                            tuple(args.by))
+    if rows:
+        ResultWriter(tuple(rows[0]), args.format).write_all(rows)
+
+def command_heatmap(args):
+    from heatmap import Heatmaps, KINDS
+    world = load(args.headless)(resolve_map(args.map))
+    heatmaps = Heatmaps(world.size).add_files(args.logs)
+    if not args.headless:
+        world.step_delay = args.delay
+        world.set_heatmaps(heatmaps, args.kind)
+        world.draw_grid()
+        world.run()
+    elif args.format == 'text':
+        for kind in KINDS:
+            print(f"{kind} over {heatmaps.episodes} episodes")
+            print(heatmaps.text(kind))
+    else:
+        ResultWriter(KINDS, args.format).write({kind: json.dumps(heatmaps.grids[kind].tolist()) if args.format == 'csv'
+                                                else heatmaps.grids[kind].tolist() for kind in KINDS})
+
+def command_diff(args):
+    import differential
+    from maps import generate_map
+    fields = ('map', 'seed', 'steps', 'queries', 'diverged', 'baseline_seconds', 'candidate_seconds', 'speedup')
+    writer = ResultWriter(fields, args.format)
+    totals = [0.0, 0.0]
+    diverged = 0
+    for map_file, size, seed in episode_specs(args):
+        if map_file is None:
+            text = generate_map(size, seed)
+        else:
+            with open(resolve_map(map_file)) as f:
+                text = f.read()
+        result = differential.lockstep(text, args.baseline, args.candidate)
+        totals[0] += result['baseline_seconds']
+        totals[1] += result['candidate_seconds']
+        writer.write({
+            'map': map_file if map_file is not None else f'random-{size}',
+            'seed': seed,
+            'steps': result['step'],
+            'queries': result['queries'],
+            'diverged': result['diverged'],
+            'baseline_seconds': round(result['baseline_seconds'], 3),
+            'candidate_seconds': round(result['candidate_seconds'], 3),
+            'speedup': round(result['baseline_seconds'] / result['candidate_seconds'], 2)
+                       if result['candidate_seconds'] > 0 else None,
+        })
+        if result['diverged']:
+            diverged += 1
+            print(f"{args.candidate} diverges from {args.baseline} at step {result['step']}, {result['what']}:\n"
+                  f"  {args.baseline}: {result['baseline']}\n  {args.candidate}: {result['candidate']}", file=sys.stderr)
+            if args.shrink:
+                smallest = differential.shrink(text, args.baseline, args.candidate)
+                print(f"Smallest map found that still diverges:\n{smallest}", file=sys.stderr, end='')
+    writer.write({'map': 'total', 'seed': None, 'steps': None, 'queries': None, 'diverged': diverged,
+                  'baseline_seconds': round(totals[0], 3), 'candidate_seconds': round(totals[1], 3),
+                  'speedup': round(totals[0] / totals[1], 2) if totals[1] > 0 else None})
+    if diverged:
+        sys.exit(1)
+
+def parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--backend', choices=BACKENDS, default='native', help="inference backend")
+    common.add_argument('--size', type=int, default=10, help="grid size of generated maps")
+    common.add_argument('--seed', type=int, default=None, help="seed of the first generated map")
+    common.add_argument('--format', choices=FORMATS, default='text', help="output format")
+    common.add_argument('--delay', type=float, default=0.5, help="seconds each move stays on screen")
+    common.add_argument('--risk', action='store_true', help="take calculated risks with the risk model")
+    common.add_argument('--planner', type=int, default=0, metavar='DEPTH', help="plan DEPTH actions ahead")
+    common.add_argument('--pool', type=int, default=0, metavar='WORKERS',
+                        help="answer hazard queries in WORKERS processes, experimental and off by default")
+    common.add_argument('--label', help="name of the agent configuration in results, derived from the options "
+                                        "without one")
+    common.add_argument('--step-seconds', type=float, help="inference time the agent may spend on one step")
+    common.add_argument('--step-resolvents', type=int, help="resolvents the agent may derive on one step")
+    common.add_argument('--episode-seconds', type=float, help="inference time the agent may spend on the episode")
+    common.add_argument('--episode-resolvents', type=int, help="resolvents the agent may derive on the episode")
+    common.add_argument('--max-steps', type=int, help="steps after which the episode is cut short")
+    common.add_argument('--events', help="file to stream agent events to, binary for a .bin name, JSON lines "
+                                         "otherwise; batch numbers one file per episode")
+
+    result = argparse.ArgumentParser(description="Wumpus World agent")
+    result.add_argument('--profile-import', action='store_true', help="report the import time of each module and exit")
+    commands = result.add_subparsers(dest='command')
+
+    run = commands.add_parser('run', parents=[common], help="explore a map in the pygame window")
+    run.add_argument('map', nargs='?', help="map file, a generated map without one")
+    run.set_defaults(handler=command_run)
+
+    sim = commands.add_parser('sim', parents=[common], help="explore one map without a window")
+    sim.add_argument('map', nargs='?', help="map file, a generated map without one")
+    sim.add_argument('--checkpoint', help="snapshot file to save the episode to")
+    sim.add_argument('--every', type=int, default=50, help="agent steps between snapshots")
+    sim.set_defaults(handler=command_sim)
+
+    batch = commands.add_parser('batch', parents=[common], help="explore many maps without a window")
+    batch.add_argument('maps', nargs='*', help="map files")
+    batch.add_argument('--count', type=int, default=0, help="generated maps to add, seeded from --seed on")
+    batch.add_argument('--workers', type=int, default=1, help="episodes run at once in worker processes")
+    batch.add_argument('--save', help="also save the results as a .npy file for report and compare")
+    batch.add_argument('--checkpoint', metavar='DIR',
+                       help="directory to keep finished results and episode snapshots in; running the same batch "
+                            "again with it skips finished episodes and resumes the one interrupted")
+    batch.add_argument('--every', type=int, default=50, help="agent steps between snapshots")
+    batch.set_defaults(handler=command_batch)
+
+    bench = commands.add_parser('bench', parents=[common], help="time episodes")
+    bench.add_argument('maps', nargs='*', help="map files")
+    bench.add_argument('--count', type=int, default=0, help="generated maps to add, seeded from --seed on")
+    bench.add_argument('--repeat', type=int, default=3, help="runs of every map")
+    bench.set_defaults(handler=command_bench)
+
+    team = commands.add_parser('team', parents=[common], help="time how map coverage scales with the team size")
+    team.add_argument('map', nargs='?', help="map file, a generated map without one")
+    team.add_argument('--agents', type=int, nargs='+', default=[1, 2, 4], help="team sizes to run, one episode each")
+    team.add_argument('--threaded', action='store_true', help="step the agents in threads instead of round-robin")
+    team.set_defaults(handler=command_team)
+
+    replay = commands.add_parser('replay', parents=[common], help="resume an episode from a snapshot")
+    replay.add_argument('snapshot', help="snapshot file saved by sim --checkpoint")
+    replay.add_argument('--headless', action='store_true', help="resume without a window")
+    replay.set_defaults(handler=command_replay)
+
+    group_by = dict(nargs='+', default=['size', 'density'], choices=('label', 'map', 'size', 'density', 'backend'),
+                    help="columns to group episodes by; density is binned")
+    report = commands.add_parser('report', help="statistics and leaderboard of batch results")
+    report.add_argument('results', nargs='+', help="result files (.npy, JSON lines or CSV)")
+    report.add_argument('--by', **group_by)
+    report.add_argument('--format', choices=FORMATS, default='text', help="output format")
+    report.set_defaults(handler=command_report)
+
+    compare = commands.add_parser('compare', help="compare the batch results of two agent configurations")
+    compare.add_argument('baseline', help="result file of the first configuration")
+    compare.add_argument('candidate', help="result file of the second configuration")
+    compare.add_argument('--by', **group_by)
+    compare.add_argument('--format', choices=FORMATS, default='text', help="output format")
+    compare.set_defaults(handler=command_compare)
+
+    diff = commands.add_parser('diff', help="check that two configurations make the same decisions")
+    diff.add_argument('maps', nargs='*', help="map files")
+    diff.add_argument('--count', type=int, default=0, help="generated maps to add, seeded from --seed on")
+    diff.add_argument('--size', type=int, default=10, help="grid size of generated maps")
+    diff.add_argument('--seed', type=int, default=None, help="seed of the first generated map")
+    diff.add_argument('--baseline', default='sympy', help="reference configuration: a backend, optionally with "
+                                                          "+pool and +planN; the process pool of +pool costs a few "
+                                                          "ms per step and only pays off when single queries do")
+    diff.add_argument('--candidate', default='native', help="configuration checked against the baseline")
+    diff.add_argument('--no-shrink', dest='shrink', action='store_false', help="do not shrink diverging maps")
+    diff.add_argument('--format', choices=FORMATS, default='text', help="output format")
+    diff.set_defaults(handler=command_diff)
+
+    heatmap = commands.add_parser('heatmap', help="visit, death and inference time heatmaps of recorded episodes")
+    heatmap.add_argument('map', help="map file the episodes were run on")
+    heatmap.add_argument('logs', nargs='+', help="event logs written with --events")
+    heatmap.add_argument('--kind', choices=('visits', 'deaths', 'inference'), default='visits',
+                         help="heatmap shown first; H switches in the window")
+    heatmap.add_argument('--headless', action='store_true', help="print the heatmaps instead of showing them")
+    heatmap.add_argument('--delay', type=float, default=0.5, help="seconds each move stays on screen")
+    heatmap.add_argument('--format', choices=FORMATS, default='text', help="output format with --headless")
+    heatmap.set_defaults(handler=command_heatmap)
+    return result
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    if args.command is None:
+        # Without a command the window opens on the first map, as it always has
+        args = parser().parse_args((['--profile-import'] if args.profile_import else [])
+                                   + ['run', os.path.join('input', 'map1.txt')])
+    if args.profile_import:
+        headless = args.command in HEADLESS_COMMANDS or getattr(args, 'headless', False)
+        profile_import(headless, getattr(args, 'backend', 'native'))
+        return
+    args.handler(args)
 
 if __name__ == "__main__":
-    input_file = "./input/map1.txt"  # Path to your input file
-    program = Program(input_file)
-    program.run()  # Launch the Pygame visualization
\ No newline at end of file
+    main()
@@ -0,0 +1,32 @@
+import random
+
+DENSITY = {'P': 0.1, 'W': 0.05, 'P_G': 0.05, 'H_P': 0.05, 'G': 0.05}  # chance of each element in a cell
+
+def generate_map(size=10, seed=None, density=None):
+    """Returns the text of a random map in the format of the input files.
+
+    Each cell holds at most one element and the start cell (1, 1) is empty.
+    """
+    rng = random.Random(seed)
+    density = density if density is not None else DENSITY
+    rows = []
+    for i in range(size):
+        row = []
+        for j in range(size):
+            if (size - i, j + 1) == (1, 1):
+                row.append('A')
+                continue
+            roll = rng.random()
+            cell = '-'
+            for element, chance in density.items():
+                if roll < chance:
+                    cell = element
+                    break
+                roll -= chance
+            row.append(cell)
+        rows.append('.'.join(row))
+    return '\n'.join([str(size)] + rows) + '\n'
+
+def save_map(text, path):
+    with open(path, 'w') as f:
+        f.write(text)
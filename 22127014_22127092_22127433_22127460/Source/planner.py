@@ -0,0 +1,137 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+from directions import DIRECTIONS, MOVES, TURN_COST
+
+EXPLORE_VALUE = 100  # expected worth of stepping into an unvisited cell
+POTION_VALUE = 15
+DEATH = -10000
+MAX_DEPTH = 3
+PARALLEL_DEPTH = 5  # root branches are searched in worker processes from this depth
+TABLE_LIMIT = 200000
+
+class Belief(NamedTuple):
+    """What the agent believes about the world, cheap to copy.
+
+    Every field is immutable, so a successor belief shares all the sets it
+    does not change with its parent.
+    """
+    pos: tuple
+    facing: int  # index into DIRECTIONS
+    hp: int
+    available_hp: int
+    arrows: int
+    visited: frozenset
+    safe: frozenset  # no pit and no wumpus
+    poison_free: frozenset
+    potions: frozenset
+    wumpus: frozenset
+    start: tuple
+    grid_size: int
+    climbed: bool = False
+
+def hp_value(hp):
+    # Backtracking is not planned and may cross poison again, so low hp is costly
+    if hp <= 0:
+        return DEATH
+    return -(100 - hp) ** 2 // 10 if hp < 100 else 0
+
+def actions(belief):
+    if belief.climbed:
+        return []
+    result = []
+    if belief.pos == belief.start:
+        result.append(('climb', None))
+    if belief.available_hp > 0 and belief.hp < 100:
+        result.append(('heal', None))
+    if belief.pos in belief.potions:
+        result.append(('grab', None))
+    x, y = belief.pos
+    for direction, (dx, dy) in enumerate(MOVES):
+        cell = (x + dx, y + dy)
+        if belief.arrows > 0 and cell in belief.wumpus:
+            result.append(('shoot', direction))
+        if cell in belief.safe:
+            result.append(('move', direction))
+    return result
+
+def apply(belief, action):
+    """Returns (reward, successor belief) of an action in a belief."""
+    kind, direction = action
+    if kind == 'climb':
+        return 10, belief._replace(climbed=True)
+    if kind == 'heal':
+        return -10, belief._replace(hp=belief.hp + 25, available_hp=belief.available_hp - 1)
+    if kind == 'grab':
+        return -10 + POTION_VALUE, belief._replace(available_hp=belief.available_hp + 1,
+                                                   potions=belief.potions - {belief.pos})
+    dx, dy = MOVES[direction]
+    cell = (belief.pos[0] + dx, belief.pos[1] + dy)
+    reward = -TURN_COST[belief.facing][direction]
+    if kind == 'shoot':
+        safe = belief.safe | {cell} if cell in belief.poison_free else belief.safe
+        return reward - 100, belief._replace(facing=direction, arrows=belief.arrows - 1,
+                                             wumpus=belief.wumpus - {cell}, safe=safe)
+    reward -= 10
+    hp = belief.hp
+    if cell not in belief.poison_free:
+        hp -= 25
+    if cell not in belief.visited:
+        reward += EXPLORE_VALUE
+        visited = belief.visited | {cell}
+    else:
+        visited = belief.visited
+    return reward, belief._replace(pos=cell, facing=direction, hp=hp, visited=visited)
+
+def evaluate(belief):
+    return hp_value(belief.hp) + POTION_VALUE * belief.available_hp
+
+def search(belief, depth, table):
+    """Best total reward reachable from belief within depth actions."""
+    key = (belief, depth)
+    if key in table:
+        return table[key]
+    options = actions(belief) if depth > 0 and belief.hp > 0 else []
+    if not options:
+        value = evaluate(belief)
+    else:
+        value = max(reward + search(successor, depth - 1, table)
+                    for reward, successor in (apply(belief, action) for action in options))
+    table[key] = value
+    return value
+
+def search_branch(belief, action, depth):
+    reward, successor = apply(belief, action)
+    return reward + search(successor, depth - 1, {})
+
+class Planner:
+    def __init__(self, depth=MAX_DEPTH, workers=None):
+        self.depth = depth
+        self.workers = workers
+        self.executor = None
+        self.table = {}
+
+    def best_action(self, belief):
+        """Returns the first action of the best plan, or None when nothing is possible."""
+        options = actions(belief)
+        if not options:
+            return None
+        if self.depth >= PARALLEL_DEPTH and len(options) > 1:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.workers)
+            values = list(self.executor.map(search_branch, [belief] * len(options), options,
+                                            [self.depth] * len(options)))
+        else:
+            values = []
+            for action in options:
+                reward, successor = apply(belief, action)
+                values.append(reward + search(successor, self.depth - 1, self.table))
+        # Beliefs carry everything search looks at, so entries stay valid across steps
+        if len(self.table) > TABLE_LIMIT:
+            self.table.clear()
+        kind, direction = options[max(range(len(options)), key=lambda i: values[i])]
+        return kind, DIRECTIONS[direction] if direction is not None else None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
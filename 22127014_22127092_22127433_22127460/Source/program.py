@@ -1,23 +1,52 @@
+import os
 import pygame
 import sys
 import time
-from agent import Agent
+from world import World
 
-class Program:
-    def __init__(self, input_file):
-        self.map_files = ['./input/map1.txt', './input/map2.txt', './input/map3.txt', './input/map4.txt', './input/map5.txt']
-        self.load_map(input_file)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+VIEW_SIZE = 750  # largest grid area in pixels; bigger maps scroll inside it
+ZOOM_LEVELS = (8, 12, 16, 25, 40, 75)  # cell sizes in pixels
+TEXT_ZOOM = 40  # smallest cell size element names fit in; smaller cells get colour marks
+MINIMAP = pygame.Rect(10, 500, 230, 230)
+ELEMENT_COLORS = {
+    '.W.': (160, 0, 0),
+    '.P.': (0, 0, 0),
+    '.G.': (230, 190, 0),
+    '.P_G.': (0, 150, 0),
+    '.H_P.': (230, 80, 160),
+    '.B.': (120, 170, 255),
+    '.S.': (170, 110, 60),
+    '.W_H.': (150, 220, 150),
+    '.G_L.': (250, 200, 230),
+}
+
+def asset(name):
+    return os.path.join(BASE_DIR, 'assets', name)
+
+class Program(World):
+    def __init__(self, input_file=None, text=None):
+        self.map_files = [os.path.join(BASE_DIR, 'input', f'map{i}.txt') for i in range(1, 6)]
         self.left_width = 250
+        self.step_delay = 0.5  # seconds each move stays on screen
+        self.heatmaps = None
+        self.overlay = None  # kind of heatmap drawn over the grid
+        self.overlay_cache = None  # (overlay, one pixel per cell surface)
+        self.overlay_view = None  # (overlay, cell size, view, surface scaled to the view)
+        self.view = (0, 0)  # grid row and column at the top left of the view
+        self.tiles = {}  # cell size -> {cell content: rendered cell}
+        self.agent_images = {}
+        self.start_image = None
+        self.minimap = None
         pygame.init()
+        self.font = pygame.font.SysFont(None, 24)
+        super().__init__(input_file, text)
         self.set_screen_size()
         self.button_surface = pygame.Surface((self.left_width, self.height))
         pygame.display.set_caption("Wumpus World")
         self.button_selected = 0
-        self.agent_pos = [((1, 1), 'NORTH')]
-        self.actions_log = []
-        self.step = 0
         self.scroll_y = 0
-        self.visited = set()
         self.map_buttons = [pygame.Rect(10, 10 + i * 60, 100, 50) for i in range(5)]
         self.control_buttons = {
             'run': pygame.Rect(10, 310, 100, 50),
@@ -26,16 +55,16 @@ class Program:
         }
         
         self.object = {
-            '.W.': ('./assets/wumpus.png', 'Wumpus'),
-            '.P.': ('./assets/pit.png', 'Pit'),
-            '.B.': ('./assets/breeze.png', 'Breeze'),
-            '.S.': ('./assets/stench.png', 'Stench'),
-            '.G.': ('./assets/gold.png', 'Gold'),
-            '.P_G.': ('./assets/poisonous_gas.png', 'Poisonous Gas'),
-            '.H_P.': ('./assets/healing_potion.png', 'Healing Potion'),
-            '.W_H.': ('./assets/whiff.png', 'Whiff'),
-            '.G_L.': ('./assets/glow.png', 'Glow'),
-            '.V.': ('./assets/wumpus.png', 'Visited')
+            '.W.': (asset('wumpus.png'), 'Wumpus'),
+            '.P.': (asset('pit.png'), 'Pit'),
+            '.B.': (asset('breeze.png'), 'Breeze'),
+            '.S.': (asset('stench.png'), 'Stench'),
+            '.G.': (asset('gold.png'), 'Gold'),
+            '.P_G.': (asset('poisonous_gas.png'), 'Poisonous Gas'),
+            '.H_P.': (asset('healing_potion.png'), 'Healing Potion'),
+            '.W_H.': (asset('whiff.png'), 'Whiff'),
+            '.G_L.': (asset('glow.png'), 'Glow'),
+            '.V.': (asset('wumpus.png'), 'Visited')
         }
 
         self.running = False
@@ -44,104 +73,207 @@ class Program:
         self.draw_action_log()
 
     def set_screen_size(self):
-        self.cell_size = 75
-        self.width = self.size * self.cell_size + 600
-        self.height = max(self.size * self.cell_size, 800)
+        # Small maps are drawn whole as before; larger ones get the biggest zoom level that fits
+        fit = VIEW_SIZE // max(self.size, 1)
+        self.cell_size = max([level for level in ZOOM_LEVELS if level <= fit], default=ZOOM_LEVELS[0])
+        self.view_width = min(self.size * self.cell_size, VIEW_SIZE)
+        self.width = self.left_width + self.view_width + 350
+        self.height = max(self.view_width, 800)
         self.screen = pygame.display.set_mode((self.width, self.height))
+        self.set_view(self.size, 0)
 
-    def load_map(self, input_file):
-        self.map, self.size = self.read_map(input_file)
-        self.update_percepts()
+    def load_text(self, text):
+        super().load_text(text)
         self.set_screen_size()
+        self.set_heatmaps(None)
+        self.reset_minimap()
 
-    def read_map(self, input_file):
-        with open(input_file, 'r') as f:
-            size = int(f.readline().strip())
-            grid = [['-' for _ in range(size)] for _ in range(size)]
-            for i in range(size):
-                line = [cell for cell in f.readline().strip().split('.')]
-                for j, cell in enumerate(line):
-                    elements = cell.split(' ')
-                    for element in elements:
-                        grid[i][j] += ' .' + element + '. '
-        return grid, size
-
-    def update_percepts(self):
-        for i in range(self.size):
-            for j in range(self.size):
-                if '.P_G.' in self.map[i][j]:
-                    self.add_percept(i, j, 'W_H')
-                if '.H_P.' in self.map[i][j]:
-                    self.add_percept(i, j, 'G_L')
-                if '.W.' in self.map[i][j]:
-                    self.add_percept(i, j, 'S')
-                if '.P.' in self.map[i][j]:
-                    self.add_percept(i, j, 'B')
-                        
-    def add_percept(self, x, y, percept):
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.size and 0 <= ny < self.size:
-                self.map[nx][ny] += ' .' + percept + '. '
-    
-    def remove_gold(self, pos):
+    def visible_cells(self):
+        # Rows and columns of the grid in the view
+        return min(self.size, self.view_width // self.cell_size)
+
+    def set_view(self, row, column):
+        last = self.size - self.visible_cells()
+        self.view = (min(max(row, 0), last), min(max(column, 0), last))
+
+    def center_view(self, pos):
         x, y = pos
-        self.map[self.size - x][y-1] = self.map[self.size - x][y-1].replace('.G.', '', 1)
-    
-    def remove_element(self, pos, element):
-        if element == 'W':
-            percept = 'S'
-        elif element == 'H_P':
-            percept = 'G_L'
+        half = self.visible_cells() // 2
+        self.set_view(self.size - x - half, y - 1 - half)
+
+    def cell_rect(self, pos):
+        """Screen rectangle of a cell, None when it is outside the view."""
         x, y = pos
-        self.map[self.size - x][y-1] = self.map[self.size - x][y-1].replace('.' + element + '.', '', 1)
-        if element not in self.map[self.size - x][y-1]:
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.size and 0 <= ny < self.size:
-                    self.map[nx][ny] = self.map[nx][ny].replace('.' + percept + '.', '', 1)
-            
-    def move_agent(self, pos, direction, step):
-        time.sleep(0.5) 
+        row, column = self.size - x - self.view[0], y - 1 - self.view[1]
+        n = self.visible_cells()
+        if not (0 <= row < n and 0 <= column < n):
+            return None
+        return pygame.Rect(self.left_width + column * self.cell_size, row * self.cell_size, self.cell_size, self.cell_size)
+
+    def zoom(self, step):
+        # Keeps the cell in the middle of the view in the middle
+        n = self.visible_cells()
+        middle = (self.size - self.view[0] - n // 2, self.view[1] + n // 2 + 1)
+        index = ZOOM_LEVELS.index(self.cell_size) + step
+        if 0 <= index < len(ZOOM_LEVELS):
+            self.cell_size = ZOOM_LEVELS[index]
+            self.center_view(middle)
+            self.redraw()
+
+    def pan(self, rows, columns):
+        self.set_view(self.view[0] + rows, self.view[1] + columns)
+        self.redraw()
+
+    def redraw(self):
+        self.draw_grid()
         if self.agent_pos[self.step][0] is not None:
-            self.clear_agent(self.agent_pos[self.step][0])
-        self.agent_pos.append((pos, direction))
-        self.visited.add(pos)
-        self.step += step
+            self.draw_agent(self.agent_pos[self.step][0], self.agent_pos[self.step][1])
+
+    def tile(self, i, j):
+        # Cells with the same content share one pre-rendered tile per zoom level
+        pos = (self.size - i, j + 1)
+        if pos == (1, 1):
+            key = 'start'
+        else:
+            key = self.map[i][j] if pos in self.visited else None
+        tiles = self.tiles.setdefault(self.cell_size, {})
+        if key not in tiles:
+            tiles[key] = self.render_tile(key)
+        return tiles[key]
+
+    def render_tile(self, key):
+        size = self.cell_size
+        surface = pygame.Surface((size, size))
+        if key == 'start':
+            if self.start_image is None:
+                self.start_image = pygame.image.load(asset('start.png'))
+            surface.blit(pygame.transform.scale(self.start_image, (size, size)), (0, 0))
+        elif key is None:
+            surface.fill((192, 192, 192))
+        else:
+            surface.fill((255, 255, 255))
+            elements = [element for element in key.split(' ') if element in self.object]
+            if size >= TEXT_ZOOM:
+                for line_idx, element in enumerate(elements):
+                    text = self.font.render(self.object[element][1], True, (0, 0, 0))
+                    surface.blit(text, (5, 5 + line_idx * 24))
+            else:
+                marks = [element for element in elements if element in ELEMENT_COLORS]
+                for k, element in enumerate(marks):
+                    width = (size - 2) // len(marks)
+                    surface.fill(ELEMENT_COLORS[element], (1 + k * width, 1, width, size - 2))
+        pygame.draw.rect(surface, (0, 0, 0), surface.get_rect(), 1)
+        return surface
+
+    def reset_minimap(self):
+        self.minimap = None  # rebuilt from the visited cells when next drawn
+
+    def minimap_surface(self):
+        # Shows the cells visited up to the step on screen, which is earlier
+        # than the last one after Back
+        if self.minimap is None:
+            self.minimap = pygame.Surface((max(self.size, 1), max(self.size, 1)))
+            self.minimap.fill((192, 192, 192))
+            for pos, _ in self.agent_pos[:self.step + 1]:
+                if pos is not None:
+                    self.paint_minimap(pos)
+        return self.minimap
+
+    def paint_minimap(self, pos):
+        # One pixel per cell, painted as cells are visited; drawing only scales it
+        x, y = pos
+        if self.minimap is not None and 1 <= x <= self.size and 1 <= y <= self.size:
+            self.minimap.set_at((y - 1, self.size - x), (255, 255, 255))
+
+    def draw_minimap(self):
+        n = self.visible_cells()
+        if n >= self.size:
+            # Clears the minimap a larger map left behind
+            self.button_surface.fill((255, 255, 255), MINIMAP)
+            return
+        self.button_surface.blit(pygame.transform.scale(self.minimap_surface(), MINIMAP.size), MINIMAP.topleft)
+        scale = MINIMAP.width / self.size
+        view = pygame.Rect(MINIMAP.x + self.view[1] * scale, MINIMAP.y + self.view[0] * scale, n * scale, n * scale)
+        pygame.draw.rect(self.button_surface, (255, 0, 0), view, 1)
+        pos = self.agent_pos[self.step][0]
+        if pos is not None:
+            dot = (MINIMAP.x + (pos[1] - 0.5) * scale, MINIMAP.y + (self.size - pos[0] + 0.5) * scale)
+            pygame.draw.circle(self.button_surface, (0, 0, 255), dot, max(2, scale / 2))
+        pygame.draw.rect(self.button_surface, (0, 0, 0), MINIMAP, 1)
+
+    def follow(self, pos):
+        if self.cell_rect(pos) is None:
+            self.center_view(pos)
+
+    def set_heatmaps(self, heatmaps, overlay='visits'):
+        self.heatmaps = heatmaps
+        self.overlay = overlay if heatmaps is not None else None
+        self.overlay_cache = None
+
+    def next_overlay(self):
+        # Cycles through every heatmap and no overlay
+        if self.heatmaps is None:
+            return
+        from heatmap import KINDS
+        kinds = list(KINDS) + [None]
+        self.overlay = kinds[(kinds.index(self.overlay) + 1) % len(kinds)]
+        self.draw_grid()
+
+    def overlay_surface(self):
+        # The heatmap is drawn once at a pixel per cell; a redraw only scales
+        # the part in view, again only when the view or zoom changed
+        if self.overlay_cache is None or self.overlay_cache[0] != self.overlay:
+            from heatmap import COLORS
+            surface = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+            grid = self.heatmaps.normalized(self.overlay)
+            color = COLORS[self.overlay]
+            for x in range(1, self.size + 1):
+                for y in range(1, self.size + 1):
+                    if grid[x - 1, y - 1] > 0:
+                        surface.set_at((y - 1, self.size - x), color + (int(40 + 180 * grid[x - 1, y - 1]),))
+            self.overlay_cache = (self.overlay, surface)
+            self.overlay_view = None
+        key = (self.overlay, self.cell_size, self.view)
+        if self.overlay_view is None or self.overlay_view[:3] != key:
+            n = self.visible_cells()
+            part = self.overlay_cache[1].subsurface(pygame.Rect(self.view[1], self.view[0], n, n))
+            surface = pygame.transform.scale(part, (n * self.cell_size, n * self.cell_size))
+            label = f"{self.overlay} over {self.heatmaps.episodes} episodes (H to switch)"
+            surface.blit(self.font.render(label, True, (0, 0, 0)), (5, n * self.cell_size - 20))
+            self.overlay_view = key + (surface,)
+        return self.overlay_view[3]
+
+    def move_agent(self, pos, direction, step):
+        time.sleep(self.step_delay)
+        super().move_agent(pos, direction, step)
+        if step < 0:
+            self.reset_minimap()  # Back leaves cells visited after the step on screen
+        elif self.agent_pos[self.step][0] is not None:
+            self.paint_minimap(self.agent_pos[self.step][0])
+        self.follow(pos)
         self.draw_grid()
         self.draw_agent(pos, direction)
         self.show_percepts(pos)
         self.screen.blit(self.button_surface, (0, 0))
         pygame.display.flip()
     
-    def clear_agent(self, pos):
-        x, y = pos
-        rect = pygame.Rect(self.left_width + self.cell_size * (y - 1), self.cell_size * (self.size - x), self.cell_size, self.cell_size)
-        pygame.draw.rect(self.screen, (255, 255, 255), rect)
-        pygame.display.flip()
-
     def draw_agent(self, pos, direction):
-        x, y = pos
-        rect = pygame.Rect(self.left_width + self.cell_size * (y - 1), self.cell_size * (self.size - x), self.cell_size, self.cell_size)
-
-        agent_images = {
-            'NORTH': pygame.image.load('./assets/agent_north.png'),
-            'EAST': pygame.image.load('./assets/agent_east.png'),
-            'SOUTH': pygame.image.load('./assets/agent_south.png'),
-            'WEST': pygame.image.load('./assets/agent_west.png')
-        }
-
-        agent_image = agent_images[direction]
-        agent_image = pygame.transform.scale(agent_image, (self.cell_size, self.cell_size))
-        self.screen.blit(agent_image, rect.topleft) 
+        rect = self.cell_rect(pos)
+        if rect is None:
+            return
+        key = (direction, self.cell_size)
+        if key not in self.agent_images:
+            image = pygame.image.load(asset(f'agent_{direction.lower()}.png'))
+            self.agent_images[key] = pygame.transform.scale(image, (self.cell_size, self.cell_size))
+        self.screen.blit(self.agent_images[key], rect.topleft)
         pygame.display.flip()
         
     def add_action(self, action):
-        self.actions_log.append(action)
+        super().add_action(action)
         self.draw_action_log()
 
     def draw_action_log(self):
-        log_x = self.left_width + self.size * self.cell_size + 10
+        log_x = self.left_width + self.view_width + 10
         log_y = self.height // 2 
         log_width = self.width - log_x - 10
         log_height = self.height // 2 - 10
@@ -163,9 +295,11 @@ class Program:
         pygame.display.flip()
 
     def handle_scroll(self, event):
-        """Handle scrolling in the action log."""
+        """Handle scrolling in the action log, or zooming over the grid."""
         if event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 4:  # Scroll up
+            if event.button in (4, 5) and self.left_width <= event.pos[0] < self.left_width + self.view_width:
+                self.zoom(1 if event.button == 4 else -1)
+            elif event.button == 4:  # Scroll up
                 if self.scroll_y > 0:
                     self.scroll_y -= 1
             elif event.button == 5:  # Scroll down
@@ -173,6 +307,7 @@ class Program:
                     self.scroll_y += 1
                     
     def update_status(self, health, point, healing_potions=0):
+        super().update_status(health, point, healing_potions)
         pygame.draw.rect(self.button_surface, (255, 255, 255), (self.left_width / 2, 0, self.left_width / 2, 200))
         font = pygame.font.SysFont(None, 24)
         health_text = font.render(f'Health: {health}', True, (0, 0, 0))
@@ -227,8 +362,27 @@ class Program:
 
         self.screen.blit(self.button_surface, (0, 0))
         
+    def handle_key(self, event):
+        # Arrows pan the view by a quarter of it, + and - zoom, H switches heatmaps
+        step = max(1, self.visible_cells() // 4)
+        moves = {pygame.K_UP: (-step, 0), pygame.K_DOWN: (step, 0), pygame.K_LEFT: (0, -step), pygame.K_RIGHT: (0, step)}
+        if event.key in moves:
+            self.pan(*moves[event.key])
+        elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            self.zoom(1)
+        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.zoom(-1)
+        elif event.key == pygame.K_h:
+            self.next_overlay()
+
     def handle_button_click(self, event):
-        if event.type == pygame.MOUSEBUTTONDOWN:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            if MINIMAP.collidepoint(event.pos) and self.visible_cells() < self.size:
+                scale = MINIMAP.width / self.size
+                self.center_view((self.size - int((event.pos[1] - MINIMAP.y) / scale),
+                                  int((event.pos[0] - MINIMAP.x) / scale) + 1))
+                self.redraw()
+                return
             for i, map_button in enumerate(self.map_buttons):
                 if map_button.collidepoint(event.pos):
                     self.select_button(i)
@@ -266,7 +420,7 @@ class Program:
             else:
                 percepts_count[element] = 1
 
-        offset_x = self.left_width + self.size * self.cell_size + 10 
+        offset_x = self.left_width + self.view_width + 10 
         offset_y = 10 
         for percept, count in percepts_count.items():
             if percept in self.object:
@@ -281,46 +435,34 @@ class Program:
         pygame.display.flip()
 
     def draw_grid(self):
+        # Only the cells in view are drawn, so a frame costs the same on any map size
         self.screen.fill((255, 255, 255))
-        start_image = pygame.image.load('./assets/start.png')  # Đường dẫn tới hình ảnh ô bắt đầu
-        start_image = pygame.transform.scale(start_image, (self.cell_size, self.cell_size))
-
-        for i in range(self.size):
-            for j in range(self.size):
-                rect = pygame.Rect(self.left_width + j * self.cell_size, i * self.cell_size, self.cell_size, self.cell_size)
-                cell_pos = (self.size - i, j + 1)
-
-                if cell_pos == (1, 1):
-                    # Vẽ hình ảnh cho ô bắt đầu
-                    self.screen.blit(start_image, rect.topleft)
-                elif cell_pos in self.visited:
-                    color = (255, 255, 255)
-                    pygame.draw.rect(self.screen, color, rect)
-                    elements = self.map[i][j].split(' ')
-                    text_lines = [self.object[element][1] for element in elements if element in self.object]
-                    for line_idx, raw_text in enumerate(text_lines):
-                        font = pygame.font.SysFont(None, 24)
-                        text = font.render(raw_text, True, (0, 0, 0))
-                        self.screen.blit(text, (self.left_width + j * self.cell_size + 5, i * self.cell_size + 5 + line_idx * 24))
-                else:
-                    color = (192, 192, 192)
-                    pygame.draw.rect(self.screen, color, rect)
-
-                pygame.draw.rect(self.screen, (0, 0, 0), rect, 1)
+        n = self.visible_cells()
+        top, left = self.view
+        for i in range(top, top + n):
+            for j in range(left, left + n):
+                self.screen.blit(self.tile(i, j), (self.left_width + (j - left) * self.cell_size, (i - top) * self.cell_size))
 
+        if self.overlay is not None:
+            self.screen.blit(self.overlay_surface(), (self.left_width, 0))
+        self.draw_minimap()
         self.screen.blit(self.button_surface, (0, 0))
         pygame.display.flip()
 
 
     def reset_map(self):
-        self.step = 0
-        self.actions_log = []
-        self.agent_pos = [((1, 1), 'NORTH')]
-        self.visited = set()
         self.running = False
-        self.update_status(100, 0)
+        super().reset_map()
+        self.reset_minimap()
         
-    def run(self):
+    def run(self, agent=None, frontier=None):
+        if agent is not None:
+            # Resume a restored episode before handing the window to the user
+            self.agent = agent
+            self.reset_minimap()
+            self.agent.explore(frontier)
+            self.draw_grid()
+            self.draw_agent(self.agent_pos[self.step][0], self.agent_pos[self.step][1])
         running = True
         while running:
             for event in pygame.event.get():
@@ -329,9 +471,11 @@ class Program:
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self.handle_button_click(event)
                     self.handle_scroll(event)
+                elif event.type == pygame.KEYDOWN:
+                    self.handle_key(event)
             if self.running:
                 self.reset_map()
-                self.agent = Agent(self)
+                self.agent = self.new_agent()
                 self.agent.explore()
                 self.draw_grid()
                 self.draw_agent(self.agent_pos[self.step][0], self.agent_pos[self.step][1])
@@ -344,19 +488,3 @@ class Program:
             pygame.time.Clock().tick(60)
         pygame.quit()
         sys.exit()
-
-    def get_cell_info(self, pos):
-        x, y = pos
-        return self.map[self.size - x][y-1]
-    
-    def print_map(self):
-        for row in self.map:
-            print(' '.join(row))
-            
-    def update_cellinfor(self, pos, infor):
-        x, y = pos
-        self.map[self.size - x][y-1] = infor
-
-    def mark_cell_safe(self, pos):
-        self.update_cellinfor(pos,'-')
-        
@@ -0,0 +1,237 @@
+import collections
+import time
+import numpy as np
+from kb import HAZARDS, BudgetExceeded, symbol_name, parse_symbol, propagate_units
+
+PRIORS = {'P': 0.2, 'W': 0.05, 'P_G': 0.1}
+ENUMERATION_LIMIT = 20  # variables per component, 2**20 models
+CHUNK_SIZE = 1 << 16
+CACHE_LIMIT = 4096
+MEMO_LIMIT = 1 << 16  # residual clause sets a model counter remembers
+TIME_BUDGET = 1.0  # seconds of exact counting per query before sampling
+CHAINS = 512
+SWEEPS = 100
+
+def components(clauses):
+    """Splits clauses into groups that share no symbol."""
+    parent = {}
+
+    def find(name):
+        while parent.setdefault(name, name) != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for clause in clauses:
+        names = [name for name, _ in clause]
+        for name in names[1:]:
+            parent[find(name)] = find(names[0])
+    groups = collections.defaultdict(list)
+    for clause in clauses:
+        groups[find(next(iter(clause))[0])].append(clause)
+    return list(groups.values())
+
+def enumerate_marginals(variables, clauses, prior):
+    """Returns P(variable is true | clauses) for every variable by weighting
+    all 2**k assignments, evaluated a chunk of models at a time."""
+    k = len(variables)
+    index = {name: i for i, name in enumerate(variables)}
+    bits = np.arange(k, dtype=np.int64)
+    total = 0.0
+    weighted = np.zeros(k)
+    for start in range(0, 1 << k, CHUNK_SIZE):
+        ids = np.arange(start, min(start + CHUNK_SIZE, 1 << k), dtype=np.int64)
+        models = ((ids[:, None] >> bits) & 1).astype(bool)
+        consistent = np.ones(len(ids), dtype=bool)
+        for clause in clauses:
+            satisfied = np.zeros(len(ids), dtype=bool)
+            for name, value in clause:
+                satisfied |= models[:, index[name]] == value
+            consistent &= satisfied
+        trues = models.sum(axis=1)
+        weights = np.where(consistent, prior ** trues * (1 - prior) ** (k - trues), 0.0)
+        total += weights.sum()
+        weighted += weights @ models
+    if total == 0:
+        return None
+    return dict(zip(variables, weighted / total))
+
+class ModelCounter:
+    """Weighted model counter returning exact marginals.
+
+    Each variable is true with the same prior. Independent components are
+    counted separately and every residual clause set is counted only once,
+    also across queries when the same counter is kept.
+    """
+    def __init__(self, prior, deadline=None):
+        self.prior = prior
+        self.deadline = deadline
+        self.memo = {}
+
+    def marginals(self, clauses):
+        total, trues = self.count(frozenset(clauses))
+        if total == 0:
+            return None
+        return {name: weight / total for name, weight in trues.items()}
+
+    def count(self, clauses):
+        """Returns (Z, {variable: Z restricted to models where it is true})."""
+        if not clauses:
+            return 1.0, {}
+        cached = self.memo.get(clauses)
+        if cached is not None:
+            return cached
+        if len(self.memo) >= MEMO_LIMIT:
+            self.memo.clear()
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise BudgetExceeded()
+
+        groups = components(clauses)
+        if len(groups) > 1:
+            total, trues = 1.0, {}
+            for group in groups:
+                group_total, group_trues = self.count(frozenset(group))
+                if group_total == 0:
+                    total, trues = 0.0, {}
+                    break
+                total *= group_total
+                for name, weight in group_trues.items():
+                    trues[name] = weight / group_total
+            trues = {name: marginal * total for name, marginal in trues.items()}
+            self.memo[clauses] = (total, trues)
+            return total, trues
+
+        occurrences = collections.Counter(name for clause in clauses for name, _ in clause)
+        variables = list(occurrences)
+        branch = occurrences.most_common(1)[0][0]
+        total = 0.0
+        trues = dict.fromkeys(variables, 0.0)
+        for value in (True, False):
+            result = propagate_units(clauses, [(branch, value)])
+            if result is None:
+                continue
+            units, rest = result
+            weight = 1.0
+            for unit_value in units.values():
+                weight *= self.prior if unit_value else 1 - self.prior
+            rest_total, rest_trues = self.count(frozenset(rest))
+            branch_total = weight * rest_total
+            total += branch_total
+            for name in variables:
+                if name in units:
+                    trues[name] += branch_total if units[name] else 0.0
+                elif name in rest_trues:
+                    trues[name] += weight * rest_trues[name]
+                else:
+                    trues[name] += branch_total * self.prior
+        self.memo[clauses] = (total, trues)
+        return total, trues
+
+def sample_marginals(variables, clauses, prior, chains=CHAINS, sweeps=SWEEPS, rng=None):
+    """Estimates marginals by Gibbs sampling many chains at once.
+
+    Every chain starts from the model with all variables true, which
+    satisfies the positive clauses that percepts leave on the frontier.
+    """
+    if not all(any(value for _, value in clause) for clause in clauses):
+        return None
+    rng = rng if rng is not None else np.random.default_rng()
+    index = {name: i for i, name in enumerate(variables)}
+    models = np.ones((chains, len(variables)), dtype=bool)
+    touching = collections.defaultdict(list)
+    for clause in clauses:
+        for name, _ in clause:
+            touching[index[name]].append(clause)
+
+    burn_in = sweeps // 5
+    trues = np.zeros(len(variables))
+    for sweep in range(sweeps):
+        for i in range(len(variables)):
+            allowed = {True: np.ones(chains, dtype=bool), False: np.ones(chains, dtype=bool)}
+            for clause in touching[i]:
+                others = np.zeros(chains, dtype=bool)
+                polarity = None
+                for name, value in clause:
+                    if index[name] == i:
+                        polarity = value
+                    else:
+                        others |= models[:, index[name]] == value
+                allowed[not polarity] &= others
+            p_true = allowed[True] * prior
+            p_false = allowed[False] * (1 - prior)
+            models[:, i] = rng.random(chains) * (p_true + p_false) < p_true
+        if sweep >= burn_in:
+            trues += models.sum(axis=0)
+    return dict(zip(variables, trues / (chains * (sweeps - burn_in))))
+
+class RiskModel:
+    def __init__(self, priors=None, enumeration_limit=ENUMERATION_LIMIT, time_budget=TIME_BUDGET, seed=None):
+        self.priors = dict(PRIORS, **(priors or {}))
+        self.enumeration_limit = enumeration_limit
+        self.time_budget = time_budget
+        self.rng = np.random.default_rng(seed)
+        self.cache = {}
+        self.counters = {kind: ModelCounter(prior) for kind, prior in self.priors.items()}
+        self.deadline = None
+
+    def component_marginals(self, kind, clauses):
+        key = (kind, frozenset(clauses))
+        if key in self.cache:
+            return self.cache[key]
+        if len(self.cache) >= CACHE_LIMIT:
+            self.cache.clear()
+        variables = sorted(set(name for clause in clauses for name, _ in clause))
+        prior = self.priors[kind]
+        if len(variables) <= self.enumeration_limit:
+            marginals = enumerate_marginals(variables, clauses, prior)
+        else:
+            # Sub-counts finished before a deadline are reused by later queries
+            counter = self.counters[kind]
+            counter.deadline = self.deadline
+            try:
+                marginals = counter.marginals(clauses)
+            except BudgetExceeded:
+                # Estimates are not cached so that a later query can still count exactly
+                return sample_marginals(variables, clauses, prior, rng=self.rng)
+        self.cache[key] = marginals
+        return marginals
+
+    def hazard_probabilities(self, clauses, cells, known=()):
+        """Returns {cell: {kind: probability}} of every hazard in the given cells,
+        given the clauses of the KB and extra known (name, value) facts.
+
+        Only components holding a variable of the cells are computed. Small
+        ones are enumerated, larger ones are model counted and sampled once
+        the time budget runs out. Cells outside every constraint keep their
+        prior.
+        """
+        self.deadline = time.perf_counter() + self.time_budget
+        clauses = [clause for clause in clauses
+                   if all(parse_symbol(name)[0] not in ('H_P', 'G_L') for name, _ in clause)]
+        result = propagate_units(clauses, known)
+        units, clauses = result if result is not None else ({}, [])
+        names = set(symbol_name(kind, cell) for cell in cells for kind in HAZARDS)
+        marginals = {}
+        for kind in HAZARDS:
+            own = [clause for clause in clauses if all(parse_symbol(name)[0] == kind for name, _ in clause)]
+            for component in components(own):
+                if any(name in names for clause in component for name, _ in clause):
+                    marginals.update(self.component_marginals(kind, component) or {})
+
+        probabilities = {}
+        for cell in cells:
+            probabilities[cell] = {}
+            for kind in HAZARDS:
+                name = symbol_name(kind, cell)
+                if name in units:
+                    probabilities[cell][kind] = float(units[name])
+                else:
+                    probabilities[cell][kind] = float(marginals.get(name, self.priors[kind]))
+        return probabilities
+
+    def death_risk(self, probabilities, lethal_poison=False):
+        # Poison only kills an agent it would leave without hp
+        survival = (1 - probabilities['P']) * (1 - probabilities['W'])
+        if lethal_poison:
+            survival *= 1 - probabilities['P_G']
+        return 1 - survival
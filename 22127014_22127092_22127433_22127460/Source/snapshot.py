@@ -0,0 +1,166 @@
+import json
+import os
+import struct
+import zlib
+from node import Node
+
+MAGIC = b'WMPS'
+VERSION = 2  # 2 added the fluent tags of the KB
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct('<4sHI')  # magic, format version, payload length
+
+def encode_KB(KB_clauses, KB_tags):
+    """Encodes clauses as a symbol table and lists of signed 1-based indices,
+    and each fluent tag as the positions of its clauses."""
+    names = {}
+    clauses = []
+    positions = {}
+    for clause in KB_clauses:
+        encoded = []
+        for name, value in sorted(clause):
+            index = names.setdefault(name, len(names) + 1)
+            encoded.append(index if value else -index)
+        positions[clause] = len(clauses)
+        clauses.append(encoded)
+    tags = [[kind, cell, sorted(positions[clause] for clause in tagged if clause in positions)]
+            for (kind, cell), tagged in KB_tags.items()]
+    return {'symbols': list(names), 'clauses': clauses, 'tags': tags}
+
+def decode_KB(data):
+    """Returns (clauses, {tag: clauses})."""
+    names = data['symbols']
+    clauses = [frozenset((names[abs(index) - 1], index > 0) for index in clause) for clause in data['clauses']]
+    tags = {(kind, tuple(cell)): set(clauses[position] for position in tagged)
+            for kind, cell, tagged in data.get('tags', [])}
+    return clauses, tags
+
+def cells(values):
+    return [tuple(cell) for cell in values]
+
+def snapshot(agent, frontier=None):
+    """Returns the agent, its world and the explore frontier as bytes."""
+    program = agent.program
+    frontier = agent.frontier if frontier is None else frontier
+    state = {
+        'agent': {
+            'KB': encode_KB(agent.backend.clauses(agent.KB), agent.KB_tags),
+            'start': agent.start,
+            'pos': agent.pos,
+            'facing': agent.facing,
+            'visited': sorted(agent.visited),
+            'unknown_cells': sorted(agent.unknown_cells),
+            'safe': sorted(agent.safe),
+            'not_unsafe': sorted(agent.not_unsafe),
+            'tracked_path': agent.tracked_path,
+            'point': agent.point,
+            'hp': agent.hp,
+            'available_hp': agent.available_hp,
+            'arrows': agent.arrows,
+            'alive': agent.alive,
+            'cause': agent.cause,
+            'potions_found': agent.potions_found,
+            'potions_used': agent.potions_used,
+            'steps': agent.steps,
+            'queries': agent.queries,
+            'inference_time': agent.inference_time,
+            'resolvents': agent.resolvents,
+            'truncated': agent.truncated,
+            'KB_size_mark': agent.KB_size_mark,
+            'KB_step_mark': agent.KB_step_mark,
+            'safety_cache': agent.safety_cache,
+        },
+        'frontier': [(node.state, node.action, node.path_cost, node.heuristic) for node in frontier],
+        'program': {
+            'size': program.size,
+            'map': program.map,
+            'visited': sorted(program.visited),
+            'agent_pos': program.agent_pos,
+            'step': program.step,
+            'actions_log': program.actions_log,
+        },
+    }
+    payload = zlib.compress(json.dumps(state, separators=(',', ':')).encode('utf-8'))
+    return HEADER.pack(MAGIC, VERSION, len(payload)) + payload
+
+def restore(data, program):
+    """Loads a snapshot into program and returns (agent, frontier).
+
+    Resume the episode with agent.explore(frontier); restoring the same
+    snapshot into several programs branches it.
+    """
+    magic, version, length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a Wumpus World snapshot")
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"unsupported snapshot version {version}")
+    state = json.loads(zlib.decompress(data[HEADER.size:HEADER.size + length]).decode('utf-8'))
+
+    world = state['program']
+    program.size = world['size']
+    program.map = world['map']
+    program.visited = set(cells(world['visited']))
+    program.agent_pos = [(tuple(pos) if pos is not None else None, direction) for pos, direction in world['agent_pos']]
+    program.step = world['step']
+    program.actions_log = world['actions_log']
+
+    saved = state['agent']
+    agent = program.new_agent()
+    clauses, tags = decode_KB(saved['KB'])
+    # Resolution follows the order the clauses were told, which budgets depend on
+    agent.KB = agent.backend.from_ordered(clauses)
+    # new_agent told the clauses of its first cell under their own tags
+    agent.KB_tags.clear()
+    agent.clause_tags.clear()
+    for tag, clauses in tags.items():
+        for clause in clauses:
+            agent.KB_tags[tag].add(clause)
+            agent.clause_tags[clause].add(tag)
+    agent.start = tuple(saved['start'])
+    agent.pos = tuple(saved['pos'])
+    agent.facing = saved['facing']
+    agent.visited = set(cells(saved['visited']))
+    agent.unknown_cells = set(cells(saved['unknown_cells']))
+    agent.safe = set(cells(saved['safe']))
+    agent.not_unsafe = set(cells(saved['not_unsafe']))
+    agent.tracked_path = [(tuple(pos), direction) for pos, direction in saved['tracked_path']]
+    agent.point = saved['point']
+    agent.hp = saved['hp']
+    agent.available_hp = saved['available_hp']
+    agent.arrows = saved.get('arrows', agent.arrows)
+    agent.alive = saved['alive']
+    agent.cause = saved.get('cause')
+    agent.potions_found = saved.get('potions_found', 0)
+    agent.potions_used = saved.get('potions_used', 0)
+    agent.steps = saved['steps']
+    agent.queries = saved.get('queries', 0)
+    agent.inference_time = saved.get('inference_time', 0.0)
+    agent.resolvents = saved.get('resolvents', 0)
+    agent.truncated = saved.get('truncated')
+    agent.safety_cache = saved['safety_cache']
+    agent.KB_size_mark = saved.get('KB_size_mark', agent.KB_size())
+    agent.KB_step_mark = saved.get('KB_step_mark', agent.steps)
+
+    frontier = [Node(tuple(cell), None, tuple(action), path_cost, heuristic)
+                for cell, action, path_cost, heuristic in state['frontier']]
+    return agent, frontier
+
+def save(agent, path, frontier=None):
+    # The old snapshot stays whole until the new one is, so an interrupted save loses nothing
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(snapshot(agent, frontier))
+    os.replace(temporary, path)
+
+def load(path, program):
+    with open(path, 'rb') as f:
+        return restore(f.read(), program)
+
+class Checkpointer:
+    """Step callback that saves a snapshot every few agent steps."""
+    def __init__(self, path, every=50):
+        self.path = path
+        self.every = every
+
+    def __call__(self, agent):
+        if agent.steps % self.every == 0:
+            save(agent, self.path)
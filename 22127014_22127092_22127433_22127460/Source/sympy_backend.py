@@ -0,0 +1,118 @@
+import collections
+from sympy import symbols, Not, And, Or, true
+from sympy.logic.boolalg import to_cnf
+
+def to_literal(literal):
+    """Converts a sympy literal to a (name, value) pair."""
+    if isinstance(literal, Not):
+        return literal.args[0].name, False
+    return literal.name, True
+
+def from_literal(literal):
+    name, value = literal
+    return symbols(name) if value else Not(symbols(name))
+
+def to_clauses(KB):
+    """Returns the clauses of a CNF sentence as frozensets of (name, value) pairs."""
+    if KB == true:
+        return []
+    args = KB.args if isinstance(KB, And) else [KB]
+    return [frozenset(to_literal(literal) for literal in (clause.args if isinstance(clause, Or) else [clause]))
+            for clause in args]
+
+def from_clauses(clauses):
+    return And(*[Or(*[from_literal(literal) for literal in clause]) for clause in clauses])
+
+def PL_resolve(literal, Ci, Cj):
+    clause1 = set(Ci.args if isinstance(Ci, Or) else [Ci])
+    clause2 = set(Cj.args if isinstance(Cj, Or) else [Cj])
+    clause1.remove(literal)
+    clause2.remove(Not(literal))
+    if any(Not(other) in clause2 for other in clause1):
+        return None
+
+    return clause1.union(clause2)
+
+def PL_resolution(KB, query, budget=None):
+    if budget is not None:
+        budget.check()
+    negate_query_cnf = to_cnf(Not(query), True)
+    # Clauses are resolved in the order of their text rather than of their
+    # hashes, so a budget runs out at the same resolvent on every run
+    fresh = sorted(negate_query_cnf.args if isinstance(negate_query_cnf, Or) else [negate_query_cnf], key=str)
+    indexed = sorted(KB.args if isinstance(KB, And) else [KB], key=str) + fresh
+    clauses = set(indexed)
+    clausesWith = collections.defaultdict(list)
+    
+    while True:
+        # Only clauses added in the last round can give new resolvents
+        for clause in indexed:
+            if isinstance(clause, Or):
+                for literal in clause.args:
+                    clausesWith[literal].append(clause)
+            else:
+                clausesWith[clause].append(clause)
+
+        pairs = []
+        for Ci in fresh:
+            if isinstance(Ci, Or):
+                for literal in sorted(Ci.args, key=str):
+                    for Cj in clausesWith[Not(literal)]:
+                        pairs.append((literal, Ci, Cj))
+            else:
+                literal = Ci
+                for Cj in clausesWith[Not(literal)]:
+                    pairs.append((literal, Ci, Cj))
+
+        new = []
+        for (literal, Ci, Cj) in pairs:
+            resolvent = PL_resolve(literal, Ci, Cj)
+            if resolvent is not None:
+                if resolvent == set():
+                    return True
+                else:
+                    if budget is not None:
+                        budget.spend()
+                    new.append(Or(*resolvent))
+
+        fresh = []
+        for clause in new:
+            if clause not in clauses:
+                clauses.add(clause)
+                fresh.append(clause)
+
+        if not fresh:
+            return False
+        indexed = fresh
+
+class SympyBackend:
+    """KB as a sympy CNF sentence, answered by PL_resolution."""
+    name = 'sympy'
+
+    def empty(self):
+        return And()
+
+    def conjoin(self, KB, clauses):
+        return And(KB, from_clauses(clauses))
+
+    def remove(self, KB, clauses):
+        removed = set(from_clauses([clause]) for clause in clauses)
+        return And(*[clause for clause in (KB.args if isinstance(KB, And) else [KB]) if clause not in removed])
+
+    def clauses(self, KB):
+        return to_clauses(KB)
+
+    def from_clauses(self, clauses):
+        return from_clauses(clauses)
+
+    def from_ordered(self, clauses):
+        # And orders its arguments itself
+        return from_clauses(clauses)
+
+    def size(self, KB):
+        if KB == true:
+            return 0
+        return len(KB.args) if isinstance(KB, And) else 1
+
+    def entails(self, KB, literal, budget=None):
+        return PL_resolution(KB, from_literal(literal), budget)
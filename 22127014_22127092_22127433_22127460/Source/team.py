@@ -0,0 +1,138 @@
+import threading
+import time
+from agent import Agent
+from kb import Knowledge
+
+HAZARD_ELEMENTS = ('.P.', '.W.', '.P_G.')
+TEAM_FIELDS = ('agents', 'seconds', 'rounds', 'steps', 'visited', 'point')
+
+class TeamAgent(Agent):
+    """Agent that shares its KB, safety cache and explored cells with a team.
+
+    Every change to the shared KB and every item pickup happens under the
+    team lock, so two agents never grab the same item or lose each other's
+    clauses; queries read the KB without locking.
+    """
+    def __init__(self, program, team, start):
+        self.team = team
+        super().__init__(program, start, team.knowledge)
+        self.visited = team.visited
+        self.safe = team.safe
+        self.not_unsafe = team.not_unsafe
+        self.unknown_cells = team.unknown_cells
+
+    def update_KB(self, entered=True):
+        with self.knowledge.lock:
+            return super().update_KB(entered)
+
+    def maintain_KB(self, force=False):
+        with self.knowledge.lock:
+            return super().maintain_KB(force)
+
+    def tell(self, clauses, tag=None):
+        with self.knowledge.lock:
+            return super().tell(clauses, tag)
+
+    def retract(self, tag):
+        with self.knowledge.lock:
+            return super().retract(tag)
+
+    def shoot(self, direction):
+        with self.knowledge.lock:
+            return super().shoot(direction)
+
+    def grab_gold(self):
+        with self.knowledge.lock:
+            return super().grab_gold()
+
+    def grab_potion(self, node):
+        with self.knowledge.lock:
+            return super().grab_potion(node)
+
+    def query_hazards(self, cells):
+        # The pool's clause log is shared by the team, one batch at a time
+        with self.team.query_lock:
+            return super().query_hazards(cells)
+
+def safe_starts(program, count):
+    """Picks count hazard-free cells, corners first, to start agents from."""
+    n = program.size
+    corners = [(1, 1), (n, n), (1, n), (n, 1), ((n + 1) // 2, (n + 1) // 2)]
+    rest = [(x, y) for x in range(1, n + 1) for y in range(1, n + 1) if (x, y) not in corners]
+    starts = []
+    for cell in corners + rest:
+        if len(starts) == count:
+            break
+        if cell not in starts and not any(element in program.get_cell_info(cell) for element in HAZARD_ELEMENTS):
+            starts.append(cell)
+    return starts
+
+class Team:
+    """Several agents exploring one world with a shared KB."""
+    def __init__(self, program, starts, risk_model=None, planner=None, query_executor=None):
+        self.program = program
+        self.knowledge = Knowledge(program.backend)
+        self.query_lock = threading.Lock()
+        self.visited = set()
+        self.safe = set()
+        self.not_unsafe = set()
+        self.unknown_cells = set((i, j) for i in range(1, program.size + 1) for j in range(1, program.size + 1))
+        self.agents = []
+        for i, start in enumerate(starts):
+            agent = TeamAgent(program, self, start)
+            agent.agent_id = i
+            agent.risk_model = risk_model
+            agent.planner = planner
+            agent.query_executor = query_executor
+            agent.budgets = program.budgets
+            self.agents.append(agent)
+        self.rounds = 0
+        self.coverage_time = 0.0
+
+    def point(self):
+        return sum(agent.point for agent in self.agents)
+
+    def run(self, threaded=False):
+        """Explores until every agent has stopped and returns the cells visited.
+
+        Round-robin stepping is deterministic; threads overlap the world's
+        step delays, but the GUI world should only be driven round-robin.
+        """
+        started = time.perf_counter()
+        covered = len(self.visited)
+
+        def record():
+            nonlocal covered
+            if len(self.visited) > covered:
+                covered = len(self.visited)
+                self.coverage_time = time.perf_counter() - started
+
+        if threaded:
+            def worker(agent):
+                for _ in agent.exploration():
+                    with self.knowledge.lock:
+                        record()
+
+            threads = [threading.Thread(target=worker, args=(agent,)) for agent in self.agents]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.rounds = max(agent.steps for agent in self.agents)
+        else:
+            running = [agent.exploration() for agent in self.agents if agent.alive]
+            while running:
+                self.rounds += 1
+                for steps in list(running):
+                    if next(steps, None) is None:
+                        running.remove(steps)
+                record()
+        return self.visited
+
+def cover(program, count, threaded=False):
+    """Runs a team of count agents, with the program's risk model, planner
+    and query pool, and returns how long covering the map took."""
+    team = Team(program, safe_starts(program, count), program.risk_model, program.planner, program.query_executor)
+    team.run(threaded)
+    return {'agents': len(team.agents), 'seconds': round(team.coverage_time, 3), 'rounds': team.rounds,
+            'steps': sum(agent.steps for agent in team.agents), 'visited': len(team.visited), 'point': team.point()}
@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def source(monkeypatch):
+    """Puts the game modules on sys.path for one test and returns their directory."""
+    monkeypatch.syspath_prepend(SOURCE_DIR)
+    return SOURCE_DIR
+
+@pytest.fixture
+def run_main():
+    """Runs a main.py command with the options and returns its JSON records.
+
+    hash_seed fixes PYTHONHASHSEED of the run, to show a result does not
+    depend on set order.
+    """
+    def run(command, *options, hash_seed=None):
+        env = os.environ if hash_seed is None else dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+        output = subprocess.run([sys.executable, 'main.py', command, *options, '--format', 'json'], cwd=SOURCE_DIR,
+                                env=env, capture_output=True, text=True, check=True).stdout
+        return [json.loads(line) for line in output.splitlines()]
+    return run
+
+@pytest.fixture
+def run_sim(run_main):
+    """Runs main.py sim with the options and returns its JSON record."""
+    def run(*options, hash_seed=None):
+        return run_main('sim', *options, hash_seed=hash_seed)[0]
+    return run
+
+@pytest.fixture
+def small_world(source):
+    """Builds a headless world from map rows, the top row first as in map files."""
+    def build(*rows):
+        from world import World
+        return World(text='\n'.join((str(len(rows)),) + rows))
+    return build
+
+@pytest.fixture
+def walk():
+    """Moves an agent through cells in order and tells its KB what it senses in each."""
+    def visit(agent, *cells):
+        for cell in cells:
+            agent.pos = cell
+            agent.visited.add(cell)
+            agent.update_KB()
+        return agent
+    return visit
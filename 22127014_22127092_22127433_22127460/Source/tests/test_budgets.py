@@ -0,0 +1,40 @@
+import os
+
+TIMINGS = ('inference_seconds', 'seconds')
+
+def untimed(record):
+    for field in TIMINGS:
+        del record[field]
+    return record
+
+def test_step_resolvent_budget_is_deterministic(run_sim):
+    options = ('input/map1.txt', '--step-resolvents', '3')
+    first = untimed(run_sim(*options, hash_seed=1))
+    assert first['truncated'] == 'resolvent'
+    assert untimed(run_sim(*options, hash_seed=2)) == first
+
+def test_episode_resolvent_budget_is_deterministic(run_sim):
+    options = ('input/map1.txt', '--episode-resolvents', '250')
+    first = untimed(run_sim(*options, hash_seed=1))
+    assert first['truncated'] == 'resolvent'
+    assert untimed(run_sim(*options, hash_seed=2)) == first
+
+def test_step_limit_is_deterministic(run_sim):
+    options = ('--seed', '3', '--max-steps', '25')
+    first = untimed(run_sim(*options, hash_seed=1))
+    assert first['truncated'] == 'step'
+    assert first['steps'] == 25
+    assert untimed(run_sim(*options, hash_seed=2)) == first
+
+def test_budget_truncation_ignores_maintenance_clock(source, monkeypatch):
+    # A clock that calls for maintenance on every step, or never, must not change a budgeted episode
+    import agent
+    from kb import Budgets
+    from main import run_episode
+    for map_file in ('input/map1.txt', 'input/map3.txt'):
+        records = []
+        for seconds in (0.0, float('inf')):
+            monkeypatch.setattr(agent, 'KB_TIME_BUDGET', seconds)
+            records.append(untimed(run_episode(os.path.join(source, map_file), budgets=Budgets(episode_resolvents=250))))
+        assert records[0]['truncated'] == 'resolvent'
+        assert records[0] == records[1]
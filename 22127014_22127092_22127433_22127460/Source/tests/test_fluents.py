@@ -0,0 +1,39 @@
+# A potion at (1, 2) glows at (1, 1) and (2, 2); gold lies at (2, 2) and a wumpus at (3, 1)
+ROWS = ('-.-.-.-', 'W.-.-.-', '-.G.-.-', '-.H_P.-.-')
+
+def test_consuming_a_potion_retracts_only_its_fluents(small_world, walk):
+    from kb import symbol_name, unit
+    from node import Node
+    agent = walk(small_world(*ROWS).new_agent(), (1, 1), (1, 2), (2, 2), (2, 1))
+    potion = {unit(symbol_name('H_P', (1, 2))), unit(symbol_name('G_L', (1, 1))), unit(symbol_name('G_L', (2, 2)))}
+    before = set(agent.backend.clauses(agent.KB))
+    assert potion <= before
+    assert agent.grab_potion(Node((1, 2), None, ('move', 'NORTH'), 0)) is not None
+    after = set(agent.backend.clauses(agent.KB))
+    assert not potion & after
+    # The gold, the stench and every untagged clause stay
+    assert before - potion <= after
+    assert unit(symbol_name('G', (2, 2))) in after
+    assert unit(symbol_name('S', (2, 1))) in after
+    assert unit(symbol_name('H_P', (1, 2)), False) in after
+
+def test_clause_told_under_two_tags_survives_one_retraction(small_world, walk):
+    from kb import symbol_name, unit
+    agent = walk(small_world(*ROWS).new_agent(), (1, 1))
+    clause = unit(symbol_name('G', (3, 3)))
+    agent.tell([clause], ('G', (3, 3)))
+    agent.tell([clause], ('G', (4, 4)))
+    assert agent.retract(('G', (3, 3))) == 0
+    assert clause in agent.backend.clauses(agent.KB)
+    assert agent.retract(('G', (4, 4))) == 1
+    assert clause not in agent.backend.clauses(agent.KB)
+
+def test_retraction_drops_cached_proofs_resting_on_it(small_world, walk):
+    from kb import symbol_name
+    agent = walk(small_world(*ROWS).new_agent(), (1, 1), (1, 2), (2, 1))
+    # The stench at (2, 1) proves the wumpus at (3, 1), which targeting caches
+    assert agent.choose_target() == 'NORTH'
+    assert agent.safety_cache[symbol_name('W', (3, 1))]
+    agent.consume('W', (3, 1))
+    assert symbol_name('W', (3, 1)) not in agent.safety_cache
+    assert agent.is_hazard_free('W', (3, 1))
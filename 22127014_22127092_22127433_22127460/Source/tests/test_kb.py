@@ -0,0 +1,50 @@
+import itertools
+
+SIZE = 3
+HAZARD_CELLS = {'P': {(3, 1)}, 'W': {(1, 3)}, 'P_G': {(2, 3)}}
+WALK = ((1, 1), (2, 1), (1, 2), (2, 2))  # cells an agent walked through
+SENSES = {'B': 'P', 'S': 'W', 'W_H': 'P_G'}
+
+def neighbors(x, y):
+    return [(x + dx, y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+            if 1 <= x + dx <= SIZE and 1 <= y + dy <= SIZE]
+
+def explored_KB():
+    """Returns the clauses of the walk and the stench units, which update_KB tags as fluents."""
+    from kb import equivalence, symbol_name, unit
+    clauses, fluents = [], []
+    for cell in WALK:
+        seen = set(percept for percept, hazard in SENSES.items() if HAZARD_CELLS[hazard] & set(neighbors(*cell)))
+        for kind in SENSES.values():
+            clauses.append(unit(symbol_name(kind, cell), False))
+        for percept, hazard in SENSES.items():
+            name = symbol_name(percept, cell)
+            clauses += equivalence(name, [symbol_name(hazard, other) for other in neighbors(*cell)])
+            clauses.append(unit(name, percept in seen))
+            if percept == 'S' and percept in seen:
+                fluents.append(clauses[-1])
+    # Duplicates, and a clause subsumed by the pit the breeze at (2, 1) entails
+    clauses += clauses[:3] + [frozenset([(symbol_name('P', (3, 1)), True), (symbol_name('P', (3, 3)), True)])]
+    return clauses, fluents
+
+def hazard_literals():
+    from kb import symbol_name
+    for kind, x, y, value in itertools.product(SENSES.values(), range(1, SIZE + 1), range(1, SIZE + 1), (True, False)):
+        yield symbol_name(kind, (x, y)), value
+
+def test_simplify_clauses_keeps_every_hazard_entailment(source):
+    from kb import refute, simplify_clauses
+    clauses, fluents = explored_KB()
+    for simplified in (simplify_clauses(clauses), simplify_clauses(clauses, frozen=fluents)):
+        assert len(simplified) < len(clauses)
+        for literal in hazard_literals():
+            assert refute(simplified, literal) == refute(clauses, literal), literal
+
+def test_simplify_clauses_keeps_entailments_of_known_facts(source):
+    from kb import refute, simplify_clauses, symbol_name, unit
+    clauses, fluents = explored_KB()
+    known = [(symbol_name('P', (1, 3)), False), (symbol_name('W', (2, 3)), False), (symbol_name('P', (3, 2)), False)]
+    together = clauses + [unit(name, value) for name, value in known]
+    simplified = simplify_clauses(clauses, known, fluents)
+    for literal in hazard_literals():
+        assert refute(simplified, literal) == refute(together, literal), literal
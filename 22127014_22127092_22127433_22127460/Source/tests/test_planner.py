@@ -0,0 +1,44 @@
+# A corridor from the start (1, 1) north through gas at (3, 1) to unexplored cells
+SAFE = {(1, 1), (2, 1), (3, 1), (4, 1), (4, 2), (4, 3), (4, 4)}
+
+def corridor(**fields):
+    from planner import Belief
+    belief = Belief(pos=(2, 1), facing=0, hp=25, available_hp=1, arrows=0, visited=frozenset({(1, 1), (2, 1)}),
+                    safe=frozenset(SAFE), poison_free=frozenset(SAFE - {(3, 1)}), potions=frozenset(),
+                    wumpus=frozenset(), start=(1, 1), grid_size=4)
+    return belief._replace(**fields)
+
+def plan(planner, belief, steps):
+    """The actions the planner takes one after another from belief."""
+    from planner import DIRECTIONS, apply
+    actions = []
+    for _ in range(steps):
+        action = planner.best_action(belief)
+        if action is None:
+            break
+        actions.append(action)
+        kind, direction = action
+        _, belief = apply(belief, (kind, DIRECTIONS.index(direction) if direction is not None else None))
+    return actions
+
+def test_heals_before_entering_gas(source):
+    from planner import Planner
+    # At 25 hp the gas would kill, so the agent heals first and then crosses it
+    assert plan(Planner(4), corridor(), 2) == [('heal', None), ('move', 'NORTH')]
+    # Without a potion it keeps out of the gas and goes home
+    assert ('move', 'NORTH') not in plan(Planner(4), corridor(available_hp=0), 4)
+
+def test_parallel_search_matches_serial(source, monkeypatch):
+    import planner
+    beliefs = [corridor(), corridor(hp=50), corridor(available_hp=0, hp=50), corridor(pos=(4, 1), facing=1, hp=75),
+               corridor(arrows=1, wumpus=frozenset({(1, 2)}), pos=(1, 1))]
+    parallel = planner.Planner(planner.PARALLEL_DEPTH, workers=2)
+    try:
+        expected = [parallel.best_action(belief) for belief in beliefs]
+        assert parallel.executor is not None
+    finally:
+        parallel.close()
+    monkeypatch.setattr(planner, 'PARALLEL_DEPTH', planner.PARALLEL_DEPTH + 1)
+    serial = planner.Planner(parallel.depth)
+    assert [serial.best_action(belief) for belief in beliefs] == expected
+    assert serial.executor is None
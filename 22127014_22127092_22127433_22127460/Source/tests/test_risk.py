@@ -0,0 +1,39 @@
+import random
+import pytest
+
+def test_risky_episodes_keep_hp_or_die(run_sim):
+    # Seeds whose risky episodes used to walk through poison and end alive on negative hp
+    for seed in ('4', '8'):
+        record = run_sim('--size', '20', '--seed', seed, '--risk')
+        assert record['hp'] >= 0 or not record['alive']
+
+def test_plain_agent_keeps_its_scores(run_sim):
+    # The poison rules of the risk model must not change the plain agent
+    for map_file, point in (('input/map1.txt', 2540), ('input/map2.txt', 2080), ('input/map4.txt', 3560)):
+        record = run_sim(map_file)
+        assert record['alive']
+        assert record['point'] == point
+
+def random_clauses(rng, variables):
+    clauses = set()
+    for _ in range(rng.randint(1, 8)):
+        names = rng.sample(variables, rng.randint(1, 3))
+        clauses.add(frozenset((name, rng.random() < 0.5) for name in names))
+    return clauses
+
+def test_model_counter_matches_enumeration(source):
+    from risk import ModelCounter, enumerate_marginals
+    rng = random.Random(0)
+    variables = [f'v{i}' for i in range(7)]
+    # One counter per prior, so later cases also hit residual sets memoised by earlier ones
+    counters = {prior: ModelCounter(prior) for prior in (0.05, 0.2, 0.5)}
+    for _ in range(300):
+        clauses = random_clauses(rng, variables)
+        names = sorted(set(name for clause in clauses for name, _ in clause))
+        prior = rng.choice(tuple(counters))
+        expected = enumerate_marginals(names, clauses, prior)
+        counted = counters[prior].marginals(clauses)
+        if expected is None:
+            assert counted is None
+        else:
+            assert counted == pytest.approx(expected)
@@ -0,0 +1,33 @@
+# The wumpus is at (3, 1); (2, 1) smells it, (1, 1) and (1, 2) do not
+ROWS = ('-.-.-.-', 'W.-.-.-', '-.-.-.-', '-.-.-.-')
+
+def test_choose_target_needs_a_proven_wumpus(small_world, walk):
+    agent = walk(small_world(*ROWS).new_agent(), (1, 1), (2, 1))
+    # The stench at (2, 1) may come from (3, 1) or (2, 2)
+    assert agent.choose_target() is None
+    walk(agent, (1, 2), (2, 1))
+    # (1, 2) smells nothing, so (2, 2) is free and the wumpus is at (3, 1)
+    assert agent.choose_target() == 'NORTH'
+
+def test_shoot_uses_up_the_arrows(small_world, walk):
+    import agent as agent_module
+    agent = walk(small_world(*ROWS).new_agent(), (1, 1), (1, 2), (2, 1))
+    for _ in range(agent_module.ARROWS):
+        assert agent.shoot('EAST')
+    assert agent.arrows == 0
+    point, facing = agent.point, agent.facing
+    assert not agent.shoot('NORTH')
+    assert (agent.point, agent.facing) == (point, facing)
+
+def test_kill_removes_the_wumpus_and_its_stench(small_world, walk):
+    from kb import symbol_name, unit
+    world = small_world(*ROWS)
+    agent = walk(world.new_agent(), (1, 1), (1, 2), (2, 1))
+    assert unit(symbol_name('S', (2, 1))) in agent.backend.clauses(agent.KB)
+    assert agent.shoot(agent.choose_target())
+    assert '.W.' not in world.get_cell_info((3, 1))
+    assert '.S.' not in world.get_cell_info((2, 1))
+    clauses = agent.backend.clauses(agent.KB)
+    assert unit(symbol_name('S', (2, 1))) not in clauses
+    assert unit(symbol_name('W', (3, 1)), False) in clauses
+    assert agent.is_hazard_free('W', (3, 1))
@@ -0,0 +1,55 @@
+import os
+import pytest
+
+def outcome(world, agent):
+    return {'point': agent.point, 'hp': agent.hp, 'alive': agent.alive, 'steps': agent.steps,
+            'visited': sorted(agent.visited), 'actions': world.actions_log}
+
+# Budgets, even without limits, time KB maintenance by steps instead of the clock;
+# a resolvent budget also makes the run depend on the order resolution takes
+@pytest.mark.parametrize('limits, step', (({}, 40), ({'step_resolvents': 4}, 30)))
+def test_resumed_episode_matches_uninterrupted_run(source, tmp_path, limits, step):
+    import snapshot
+    from kb import Budgets
+    from main import load, make_world
+    path = str(tmp_path / 'episode.snap')
+    saved = []
+
+    def checkpoint(agent):
+        if agent.steps == step:
+            snapshot.save(agent, path)
+            saved.append(agent.steps)
+
+    world = make_world(load(True, 'native'), os.path.join(source, 'input/map3.txt'), budgets=Budgets(**limits))
+    agent = world.new_agent()
+    agent.step_callbacks.append(checkpoint)
+    world.run(agent)
+    assert saved
+
+    replay = load(True, 'native')()
+    replay.backend = 'native'
+    replay.budgets = Budgets(**limits)
+    resumed, frontier = snapshot.load(path, replay)
+    assert resumed.steps == step
+    replay.run(resumed, frontier)
+    assert outcome(replay, resumed) == outcome(world, agent)
+
+def test_interrupted_batch_resumes(run_main, tmp_path):
+    # Step limits time KB maintenance by steps, so both runs maintain the KB alike
+    options = ('input/map1.txt', 'input/map3.txt', '--max-steps', '1000')
+    whole = tmp_path / 'whole'
+    expected = run_main('batch', *options, '--checkpoint', str(whole))
+    # An interruption in the second episode, after the first finished
+    cut = tmp_path / 'cut'
+    cut.mkdir()
+    first = (whole / 'results.jsonl').read_text().splitlines()[0]
+    (cut / 'results.jsonl').write_text(first + '\n{"label": "nat')
+    run_main('sim', 'input/map3.txt', '--max-steps', '1000', '--checkpoint', str(cut / 'episode-1.snap'),
+             '--every', '60')
+    assert (cut / 'episode-1.snap').exists()
+    resumed = run_main('batch', *options, '--checkpoint', str(cut))
+    for record in expected + resumed:
+        del record['seconds'], record['inference_seconds']
+    assert resumed == expected
+    assert len((cut / 'results.jsonl').read_text().splitlines()) == 2
+    assert not (cut / 'episode-1.snap').exists()
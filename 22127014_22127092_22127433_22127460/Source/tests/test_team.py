@@ -0,0 +1,62 @@
+import os
+import pytest
+
+@pytest.mark.parametrize('threaded', (False, True))
+def test_team_answers_queries_in_the_pool(source, monkeypatch, threaded):
+    from entailment import QueryExecutor
+    from main import close_world, load, make_world
+    from team import cover
+    batches = []
+    refute_all = QueryExecutor.refute_all
+
+    def counted(self, *args, **kwargs):
+        batches.append(len(args[1]))
+        return refute_all(self, *args, **kwargs)
+
+    monkeypatch.setattr(QueryExecutor, 'refute_all', counted)
+    world = make_world(load(True, 'native'), os.path.join(source, 'input/map1.txt'), pool=2)
+    try:
+        record = cover(world, 2, threaded)
+    finally:
+        close_world(world)
+    assert record['agents'] == 2
+    assert batches
+
+def test_team_agents_share_one_KB(small_world):
+    from kb import symbol_name, unit
+    from team import Team
+    world = small_world('-.-.-', '-.-.-', '-.-.-')
+    first, second = Team(world, [(1, 1), (3, 3)]).agents
+    assert first.knowledge is second.knowledge
+    fact = unit(symbol_name('P', (2, 2)), False)
+    first.tell([fact])
+    assert fact in second.backend.clauses(second.KB)
+    assert second.is_hazard_free('P', (2, 2))
+    assert first.safety_cache[symbol_name('P', (2, 2))] is False
+
+def test_an_item_goes_to_one_agent(small_world):
+    from node import Node
+    from team import Team
+    world = small_world('-.-.-', '-.G H_P.-', '-.-.-')
+    agents = Team(world, [(1, 1), (3, 3)]).agents
+    for agent in agents:
+        agent.pos = (2, 2)
+    assert [agent.grab_gold() for agent in agents] == [True, False]
+    assert [agent.grab_potion(Node((2, 2), None, ('move', 'NORTH'), 0)) is not None for agent in agents] == [True, False]
+    assert [agent.available_hp for agent in agents] == [1, 0]
+    assert agents[0].point > agents[1].point
+
+def count_items(world, element):
+    return sum(cell.count(f'.{element}.') for row in world.map for cell in row)
+
+@pytest.mark.parametrize('threaded', (False, True))
+def test_team_collects_every_item_once(source, threaded):
+    from main import load, make_world
+    from team import Team, safe_starts
+    world = make_world(load(True, 'native'), os.path.join(source, 'input/map3.txt'))
+    gold, potions = count_items(world, 'G'), count_items(world, 'H_P')
+    team = Team(world, safe_starts(world, 4))
+    team.run(threaded)
+    # Every pickup an agent counts took an item off the map, which holds each once
+    assert sum(action.startswith('Gold found') for action in world.actions_log) == gold - count_items(world, 'G')
+    assert sum(agent.potions_found for agent in team.agents) == potions - count_items(world, 'H_P')
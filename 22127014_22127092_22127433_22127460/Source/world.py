@@ -0,0 +1,158 @@
+from agent import Agent
+from kb import Knowledge
+
+class World:
+    """The map of a Wumpus World and the record of an episode in it.
+
+    It imports nothing for display; Program draws the same world with pygame.
+    """
+    def __init__(self, input_file=None, text=None):
+        if text is not None:
+            self.load_text(text)
+        elif input_file is not None:
+            self.load_map(input_file)
+        else:
+            self.map, self.size = [], 0  # to restore a snapshot into
+        self.agent_pos = [((1, 1), 'NORTH')]
+        self.actions_log = []
+        self.step = 0
+        self.visited = set()
+        self.status = (100, 0, 0)  # health, point, healing potions
+        self.backend = 'native'
+        self.risk_model = None
+        self.planner = None
+        self.query_executor = None
+        self.budgets = None
+        self.step_callbacks = []
+        self.event_sinks = []
+
+    def load_map(self, input_file):
+        with open(input_file, 'r') as f:
+            self.load_text(f.read())
+
+    def load_text(self, text):
+        self.map, self.size = self.read_map(text)
+        self.update_percepts()
+
+    def read_map(self, text):
+        lines = iter(text.splitlines())
+        size = int(next(lines).strip())
+        grid = [['-' for _ in range(size)] for _ in range(size)]
+        for i in range(size):
+            line = [cell for cell in next(lines, '').strip().split('.')]
+            for j, cell in enumerate(line):
+                elements = cell.split(' ')
+                for element in elements:
+                    grid[i][j] += ' .' + element + '. '
+        return grid, size
+
+    def update_percepts(self):
+        for i in range(self.size):
+            for j in range(self.size):
+                if '.P_G.' in self.map[i][j]:
+                    self.add_percept(i, j, 'W_H')
+                if '.H_P.' in self.map[i][j]:
+                    self.add_percept(i, j, 'G_L')
+                if '.W.' in self.map[i][j]:
+                    self.add_percept(i, j, 'S')
+                if '.P.' in self.map[i][j]:
+                    self.add_percept(i, j, 'B')
+                        
+    def add_percept(self, x, y, percept):
+        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.size and 0 <= ny < self.size:
+                self.map[nx][ny] += ' .' + percept + '. '
+    
+    def remove_gold(self, pos):
+        x, y = pos
+        if '.G.' not in self.map[self.size - x][y-1]:
+            return False
+        self.map[self.size - x][y-1] = self.map[self.size - x][y-1].replace('.G.', '', 1)
+        return True
+    
+    def remove_element(self, pos, element):
+        if element == 'W':
+            percept = 'S'
+        elif element == 'H_P':
+            percept = 'G_L'
+        x, y = pos
+        i, j = self.size - x, y - 1
+        if '.' + element + '.' not in self.map[i][j]:
+            return False
+        self.map[i][j] = self.map[i][j].replace('.' + element + '.', '', 1)
+        # Each element added one percept to every neighbour
+        for di, dj in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            ni, nj = i + di, j + dj
+            if 0 <= ni < self.size and 0 <= nj < self.size:
+                self.map[ni][nj] = self.map[ni][nj].replace('.' + percept + '.', '', 1)
+        return True
+    
+    def shoot(self, pos):
+        # True when the arrow kills a wumpus, which the agent hears as a scream
+        return self.remove_element(pos, 'W')
+            
+    def move_agent(self, pos, direction, step):
+        self.agent_pos.append((pos, direction))
+        self.visited.add(pos)
+        self.step += step
+
+    def add_action(self, action):
+        self.actions_log.append(action)
+
+    def emit(self, event):
+        for sink in self.event_sinks:
+            sink.write(event)
+
+    def update_status(self, health, point, healing_potions=0):
+        self.status = (health, point, healing_potions)
+
+    def reset_map(self):
+        self.step = 0
+        self.actions_log = []
+        self.agent_pos = [((1, 1), 'NORTH')]
+        self.visited = set()
+        self.update_status(100, 0)
+
+    def new_agent(self):
+        agent = Agent(self, knowledge=Knowledge(self.backend))
+        agent.risk_model = self.risk_model
+        agent.planner = self.planner
+        agent.query_executor = self.query_executor
+        agent.budgets = self.budgets
+        agent.step_callbacks = list(self.step_callbacks)
+        return agent
+
+    def run(self, agent=None, frontier=None):
+        """Runs one episode without display and returns the agent.
+
+        A restored agent and frontier resume their episode instead.
+        """
+        if agent is None:
+            self.reset_map()
+            agent = self.new_agent()
+        self.agent = agent
+        self.agent.explore(frontier)
+        return self.agent
+
+    def hazard_density(self):
+        """Fraction of cells holding a pit, a wumpus or poisonous gas."""
+        if not self.size:
+            return 0.0
+        hazards = sum(any(element in cell for element in ('.P.', '.W.', '.P_G.')) for row in self.map for cell in row)
+        return hazards / self.size ** 2
+
+    def get_cell_info(self, pos):
+        x, y = pos
+        return self.map[self.size - x][y-1]
+    
+    def print_map(self):
+        for row in self.map:
+            print(' '.join(row))
+            
+    def update_cellinfor(self, pos, infor):
+        x, y = pos
+        self.map[self.size - x][y-1] = infor
+
+    def mark_cell_safe(self, pos):
+        self.update_cellinfor(pos,'-')